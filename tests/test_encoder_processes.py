@@ -0,0 +1,52 @@
+"""Smoke test for the multi-process JPEG encoder (MICROSCOPE_ENCODER_PROCESSES)"""
+
+import threading
+import unittest
+
+import viewer
+
+if viewer.USB_AVAILABLE:
+    import cv2
+    import numpy as np
+
+
+@unittest.skipUnless(viewer.USB_AVAILABLE, "OpenCV/numpy not installed")
+class EncoderProcessesTest(unittest.TestCase):
+    def setUp(self):
+        self.published = []
+        self.frame_arrived = threading.Event()
+        self.saved = viewer.ENCODER_PROCESSES, viewer.publish_frame
+        viewer.ENCODER_PROCESSES = 1
+
+        def publish_frame(jpeg_bytes, sequence=None):
+            self.published.append((jpeg_bytes, sequence))
+            self.frame_arrived.set()
+        viewer.publish_frame = publish_frame
+
+    def tearDown(self):
+        viewer.stop_encoder_processes()
+        viewer.ENCODER_PROCESSES, viewer.publish_frame = self.saved
+
+    def test_encodes_one_frame(self):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, 32:] = (40, 120, 200)
+        viewer.submit_encode(frame, 90)
+
+        self.assertTrue(self.frame_arrived.wait(timeout=20), "no frame came back from the encoder")
+        jpeg_bytes, sequence = self.published[0]
+        self.assertIsNotNone(sequence)
+        decoded = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape, frame.shape)
+        self.assertLess(np.abs(decoded.astype(int) - frame).mean(), 4)
+
+    def test_new_ring_gets_new_task_queue(self):
+        viewer.submit_encode(np.zeros((48, 64, 3), dtype=np.uint8), 90)
+        tasks = viewer.encoder_state['tasks']
+        # A different frame size reallocates the ring; old tasks must not reach the new workers
+        viewer.submit_encode(np.zeros((64, 48, 3), dtype=np.uint8), 90)
+        self.assertIsNot(viewer.encoder_state['tasks'], tasks)
+        self.assertEqual(viewer.encoder_state['ring'].shape[1:], (64, 48, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
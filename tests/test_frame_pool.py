@@ -0,0 +1,84 @@
+"""apply_image_processing must never hand out a pooled buffer that is still in use"""
+
+import unittest
+from concurrent.futures import Future
+
+import viewer
+
+if viewer.USB_AVAILABLE:
+    import numpy as np
+
+SETTINGS = [
+    dict(brightness=20, contrast=1.5, gain=1.3, saturation=1.0, zoom=1.0, rotate=0),
+    dict(brightness=0, contrast=1.0, gain=1.0, saturation=1.6, zoom=1.0, rotate=90),
+    dict(brightness=-10, contrast=1.2, gain=1.0, saturation=0.5, zoom=2.0, rotate=0),
+    dict(brightness=0, contrast=1.0, gain=1.0, saturation=1.0, zoom=2.5, rotate=270),
+    dict(brightness=10, contrast=0.8, gain=1.0, saturation=0.7, zoom=0.5, rotate=0),
+    dict(brightness=0, contrast=1.5, gain=1.3, saturation=1.0, zoom=0.75, rotate=90),
+    dict(brightness=0, contrast=1.0, gain=1.0, saturation=1.0, zoom=1.0, rotate=180),
+]
+CALLS_PER_SETTING = 14  # More than FRAME_POOL_SIZE, so the pool wraps around
+
+
+@unittest.skipUnless(viewer.USB_AVAILABLE, "OpenCV/numpy not installed")
+class FramePoolAliasingTest(unittest.TestCase):
+    def setUp(self):
+        self.saved_settings = viewer.processing_settings.copy()
+        viewer.frame_pool.clear()
+        viewer.pending_encodes.clear()
+        rng = np.random.default_rng(0)
+        self.source = rng.integers(0, 256, (96, 128, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        viewer.processing_settings.update(self.saved_settings)
+        viewer.settings_changed()
+        viewer.frame_pool.clear()
+        viewer.pending_encodes.clear()
+
+    def apply(self, settings):
+        viewer.processing_settings.update(settings, flip_h=True, flip_v=False, stabilize=False)
+        viewer.settings_changed()
+
+    def reference(self, settings):
+        """Expected output, computed with a fresh allocation for every stage"""
+        self.apply(settings)
+        pooled = viewer.get_frame_buffer
+        viewer.get_frame_buffer = lambda shape, *exclude: np.empty(shape, dtype=np.uint8)
+        try:
+            return viewer.apply_image_processing(self.source.copy()).copy()
+        finally:
+            viewer.get_frame_buffer = pooled
+
+    def test_outputs_never_alias_live_buffers(self):
+        in_flight = []  # (future, output, snapshot) standing in for frames being encoded
+        for settings in SETTINGS:
+            expected = self.reference(settings)
+            self.apply(settings)
+            for call in range(CALLS_PER_SETTING):
+                # The input lives in the pool, like a TurboJPEG-decoded frame
+                frame = viewer.get_frame_buffer(self.source.shape)
+                np.copyto(frame, self.source)
+
+                out = viewer.apply_image_processing(frame)
+
+                context = f"{settings} call {call}"
+                self.assertFalse(np.may_share_memory(out, frame), context)
+                for _, busy, _ in in_flight:
+                    self.assertFalse(np.may_share_memory(out, busy), context)
+                for _, busy, snapshot in in_flight:
+                    np.testing.assert_array_equal(busy, snapshot, err_msg=context)
+                np.testing.assert_array_equal(frame, self.source, err_msg=context)
+                np.testing.assert_array_equal(out, expected, err_msg=context)
+
+                # Hand it to a (never finishing) encode, as submit_encode does
+                future = Future()
+                viewer.pending_encodes.append((future, out))
+                in_flight.append((future, out, out.copy()))
+                if len(in_flight) > viewer.MAX_PENDING_ENCODES:
+                    done, _, _ = in_flight.pop(0)
+                    done.set_result(None)
+                    viewer.pending_encodes.popleft()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""The MJPEG broadcaster must keep serving fast viewers while one viewer stalls"""
+
+import re
+import socket
+import threading
+import time
+import unittest
+
+import viewer
+
+PART_HEADER = re.compile(rb'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: (\d+)\r\n\r\n')
+FRAME_SIZE = 200 * 1024  # Several socket buffers' worth, so a stalled viewer blocks mid-frame
+
+
+def make_frame(index):
+    """Stand-in JPEG: every byte is the frame index, so torn frames are easy to spot"""
+    return bytes([index % 256]) * FRAME_SIZE
+
+
+def parse_parts(data):
+    """Split a multipart stream into frame payloads; returns (frames, unparsed tail)"""
+    frames = []
+    while True:
+        match = PART_HEADER.match(data)
+        if not match:
+            return frames, data
+        end = match.end() + int(match.group(1))
+        if len(data) < end + 2:
+            return frames, data
+        frames.append(data[match.end():end])
+        assert data[end:end + 2] == b'\r\n', "part not followed by CRLF"
+        data = data[end + 2:]
+
+
+class Viewer:
+    """One side of a socket pair registered with the broadcaster"""
+
+    def __init__(self, fps):
+        self.reader, server_side = socket.socketpair()
+        for sock in (self.reader, server_side):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 32 * 1024)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 32 * 1024)
+        self.server_side = server_side
+        self.data = b''
+        viewer.add_stream_client(server_side, fps)
+
+    def read_available(self, timeout):
+        """Read whatever arrives within timeout seconds"""
+        self.reader.settimeout(0.05)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                chunk = self.reader.recv(1 << 20)
+            except socket.timeout:
+                continue
+            if not chunk:
+                break
+            self.data += chunk
+
+    def close(self):
+        viewer.drop_stream_client(self.server_side)
+        self.reader.close()
+
+
+class StreamBroadcasterTest(unittest.TestCase):
+    def setUp(self):
+        self.publishing = True
+        self.published = 0
+        self.viewers = []
+
+    def tearDown(self):
+        self.publishing = False
+        for client in self.viewers:
+            client.close()
+
+    def publish(self, fps=60):
+        while self.publishing:
+            self.published += 1
+            viewer.publish_frame(make_frame(self.published))
+            time.sleep(1.0 / fps)
+
+    def test_slow_viewer_does_not_hold_back_others(self):
+        fast = Viewer(fps=29)
+        slow = Viewer(fps=29)
+        self.viewers += [fast, slow]
+        threading.Thread(target=self.publish, daemon=True).start()
+
+        # The slow viewer reads nothing for a second while the fast one keeps up
+        fast.read_available(timeout=1.0)
+        fast_frames, _ = parse_parts(fast.data)
+        self.assertGreater(len(fast_frames), 15, "fast viewer starved by the stalled one")
+
+        slow.read_available(timeout=0.5)
+        self.publishing = False
+        last_published = make_frame(self.published)
+        slow.read_available(timeout=0.5)
+        slow_frames, _ = parse_parts(slow.data)
+
+        # The stalled viewer skipped frames instead of queueing them...
+        self.assertGreater(len(slow_frames), 0)
+        self.assertLess(len(slow_frames), len(fast_frames))
+        # ...every frame it got is whole (no frame was overwritten while in flight)...
+        for frame in fast_frames + slow_frames:
+            self.assertEqual(len(frame), FRAME_SIZE)
+            self.assertEqual(frame.count(frame[:1]), FRAME_SIZE, "torn frame")
+        # ...and once it catches up it is sent the newest frame
+        self.assertEqual(slow_frames[-1], last_published)
+
+    def test_dead_viewer_is_dropped(self):
+        client = Viewer(fps=29)
+        self.viewers.append(client)
+        threading.Thread(target=self.publish, daemon=True).start()
+        client.read_available(timeout=0.3)
+        client.reader.close()
+
+        deadline = time.monotonic() + 2.0
+        while client.server_side in viewer.stream_state['clients'] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertNotIn(client.server_side, viewer.stream_state['clients'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,21 +5,34 @@
 # Supports both WiFi (UDP) and USB (webcam) modes
 
 import time
+import re
+import select
+import selectors
 import socket
+import struct
 import threading
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
 import sys
 import io
 import os
+import gzip
+import json
 import warnings
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Try to import PIL for better JPEG encoding
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+def env_int(name, default, minimum=0):
+    """Integer setting from the environment (at least minimum); an invalid value keeps the default"""
+    try:
+        return max(minimum, int(os.environ.get(name, default)))
+    except ValueError:
+        print(f"Ignoring invalid {name}, using {default}")
+        return default
 
 try:
     import usb.core
@@ -31,19 +44,47 @@ try:
     import cv2
     import numpy as np
     USB_AVAILABLE = True
+    # Let OpenCV spread resize/cvtColor/LUT over the other cores (some ARM
+    # builds default to one thread) but leave two for capture and JPEG encode,
+    # otherwise its workers thrash with them on a Pi. MICROSCOPE_CV_THREADS
+    # overrides this (at least 1; an invalid value keeps the default).
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(env_int('MICROSCOPE_CV_THREADS', max(1, (os.cpu_count() or 2) - 2), 1))
 except ImportError:
     USB_AVAILABLE = False
     print("OpenCV not available. Install with: pip3 install opencv-python")
 
+# Try to import PyTurboJPEG (libjpeg-turbo SIMD encoder) for faster JPEG encoding
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420, TJFLAG_FASTDCT
+    turbo_jpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception:  # ImportError, or libturbojpeg shared library not found
+    TURBOJPEG_AVAILABLE = False
+
+# Try to import Numba for the fused single-pass processing kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = USB_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 HOST = "192.168.29.1"  # Microscope hard-wired IP address
 SPORT = 20000          # Microscope command port
 RPORT = 10900          # Receive port for JPEG frames
+PACKET_HEADER = struct.Struct('<HxB')  # Frame count (LE uint16), pad, packet count within frame
 WEB_PORT = 8080        # Web server port
-
-current_frame = None
-current_frame_number = 0  # Increments with each new frame
-frame_lock = threading.Lock()
-frame_event = threading.Event()
+DEBUG = os.environ.get('MICROSCOPE_DEBUG') == '1'  # Periodic fps/frame logs and request traces
+
+# Latest JPEG frame as one immutable (jpeg_bytes, frame_number, mjpeg_part_header)
+# tuple. publish_frame() swaps in a new tuple with a single reference store,
+# which is atomic under the GIL, so readers never need a lock.
+current_frame = (None, 0, b'')
+frame_lock = threading.Lock()  # Serializes publishers only
+frame_published = threading.Condition(frame_lock)  # Notified for every published frame
+frame_event = threading.Event()  # Set once the first frame is available
+frame_sequence = itertools.count(1)  # Orders published frames (encodes can finish out of order)
+published_sequence = 0  # Sequence number of the newest published frame
 running = True
 target_fps = 29  # Default target FPS for streaming
 connection_mode = None  # Will be 'wifi', 'usb', or None
@@ -66,10 +107,19 @@ processing_settings = {
     'stabilize': False   # Image stabilization on/off
 }
 processing_lock = threading.Lock()
+settings_version = 0  # Bumped (under processing_lock) after every settings change
+
+# Shared read-only snapshot of processing_settings as one immutable
+# (version, settings, identity) tuple, swapped atomically and refreshed only
+# when settings_version moves on. identity is True when processing would
+# leave the frame unchanged. Used by the capture and processing threads.
+settings_snapshot = (-1, None, False)
 
 # Stabilization state
 stabilization_state = {
-    'prev_gray': None,
+    'prev_float': None,   # Previous gray frame (one of float_pair), None until a frame is seen
+    'float_pair': None,   # Two float32 buffers zero-padded to a fast DFT size, used alternately
+    'float_size': None,   # (h, w) of the frames float_pair was allocated for
     'accumulated_x': 0.0,
     'accumulated_y': 0.0,
     'smooth_correction_x': 0.0,  # Smoothed output correction
@@ -77,10 +127,19 @@ stabilization_state = {
     'noise_threshold': 0.5,  # Ignore motion smaller than this (pixels)
     'correction_smoothing': 0.3,  # Smooth the correction output (0=no smooth, 1=max smooth)
     'decay': 0.6,  # How fast correction returns to center (lower=faster)
-    'frame_buffer': [],  # Buffer for frame blending
+    'blend_accum': None,  # float32 running average for frame blending
+    'warp_matrix': None,  # 2x3 float32 translation matrix, offsets updated per frame
     'blend_frames': 2  # Number of frames to blend (1=no blending, 2-4 for smoothing)
 }
 stabilization_lock = threading.Lock()
+STABILIZE_TILE = 512  # Max side of the half-resolution tile used for motion detection
+
+# Lookup table for brightness/contrast/gain (rebuilt only when settings change)
+lut_cache = {
+    'signature': None,  # (brightness, contrast, gain) the table was built for
+    'bc': None          # 256-entry uint8 brightness/contrast/gain table for every channel
+}
+
 usb_camera_cap = None  # Global reference to camera
 
 # Capture settings
@@ -90,17 +149,123 @@ auto_exposure = True  # Auto exposure on/off
 exposure_value = -6  # Manual exposure value (typically -13 to 0, camera dependent)
 capture_settings_lock = threading.Lock()
 
-# Context manager to suppress libjpeg warnings
+# JPEG encoding runs on a small worker pool so capture/processing never waits on
+# the encoder (cv2.imencode releases the GIL). Only the newest frames are kept.
+encode_executor = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) // 4))
+pending_encodes = deque()  # (future, frame) of in-flight encodes, oldest first
+MAX_PENDING_ENCODES = 2
+
+# Optional multi-process JPEG encoding for multi-core hosts. With
+# ENCODER_PROCESSES > 0 (MICROSCOPE_ENCODER_PROCESSES), processed frames are
+# copied into a shared-memory ring and encoded by worker processes, so encoding
+# isn't bound to one interpreter.
+ENCODER_PROCESSES = env_int('MICROSCOPE_ENCODER_PROCESSES', 0)
+ENCODER_RING_SLOTS = 4  # Frames that can be waiting on / inside the workers
+encoder_state = {
+    'shm': None,          # SharedMemory backing the frame ring
+    'ring': None,         # (slots, h, w, 3) uint8 view of the shared memory
+    'generation': 0,      # Bumped whenever the ring is reallocated
+    'workers': [],
+    'tasks': None,        # Queue of (slot, sequence, quality), new for every generation
+    'results': None,      # Queue of (generation, slot, sequence, jpeg_bytes)
+    'busy_slots': set(),  # Ring slots handed to a worker and not yet returned
+    'next_slot': 0
+}
+encoder_lock = threading.Lock()
+
+# Optional named shared-memory ring of the last SHARED_RING_FRAMES processed
+# frames, so external tools (recorders, GPU encoders) can read raw BGR pixels
+# without going through HTTP. Layout: a 64-byte header of uint64
+# [sequence, height, width, channels], then the frames. The newest frame is
+# slot (sequence - 1) % SHARED_RING_FRAMES. 0 (MICROSCOPE_SHARED_RING_FRAMES
+# default) disables the ring. While it is on, capture never idles and camera
+# JPEGs are always decoded, since nothing tells us when readers are attached.
+SHARED_RING_NAME = 'microscope_ring'
+SHARED_RING_FRAMES = env_int('MICROSCOPE_SHARED_RING_FRAMES', 0)
+SHARED_RING_HEADER = 64
+shared_ring = {
+    'shm': None,
+    'header': None,  # uint64 view of the header
+    'frames': None   # (SHARED_RING_FRAMES, h, w, c) uint8 view
+}
+
+# Newest captured frame waiting for the processing thread. Capture threads only
+# drop frames in here, so camera reads never wait on processing; a frame that
+# isn't picked up before the next one arrives is simply replaced.
+raw_mailbox = {
+    'frame': None,    # BGR array (USB) or camera JPEG bytes (WiFi)
+    'quality': 70,    # JPEG quality to encode it with
+    'thread': None
+}
+raw_condition = threading.Condition()
+
+# Reusable uint8 frame buffers for processing output (see get_frame_buffer)
+frame_pool = []
+FRAME_POOL_SIZE = 12
+pinned_frames = []  # Input of the current apply_image_processing call, never handed out
+
+# Context manager to suppress libjpeg warnings. /dev/null and the saved stderr
+# are opened once, so each use costs just two dup2() calls.
 class SuppressStderr:
+    null_fd = None
+    save_fd = None
+
     def __enter__(self):
-        self.null_fd = os.open(os.devnull, os.O_RDWR)
-        self.save_fd = os.dup(2)
+        if SuppressStderr.null_fd is None:
+            SuppressStderr.null_fd = os.open(os.devnull, os.O_RDWR)
+            SuppressStderr.save_fd = os.dup(2)
         os.dup2(self.null_fd, 2)
 
     def __exit__(self, *_):
         os.dup2(self.save_fd, 2)
-        os.close(self.null_fd)
-        os.close(self.save_fd)
+
+def get_frame_buffer(shape, *exclude):
+    """Return a pooled uint8 buffer not shared with `exclude`, the frame being processed or one still being encoded"""
+    busy = [buf for f, buf in pending_encodes if not f.done()]
+    busy.extend(pinned_frames)
+    busy.extend(exclude)
+    for i, buf in enumerate(frame_pool):
+        if buf.shape == shape and not any(np.may_share_memory(buf, b) for b in busy):
+            # Keep the pool in least-recently-used order
+            frame_pool.append(frame_pool.pop(i))
+            return buf
+
+    # Evict idle buffers (e.g. from an old zoom level) once the pool is full
+    for buf in list(frame_pool):
+        if len(frame_pool) < FRAME_POOL_SIZE:
+            break
+        if not any(np.may_share_memory(buf, b) for b in busy):
+            frame_pool.remove(buf)
+    buf = np.empty(shape, dtype=np.uint8)
+    frame_pool.append(buf)
+    return buf
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def fused_process(src, dst, lut_bc, sat_mul, flip_h, flip_v):
+        """Flip + brightness/contrast + saturation in a single pass over the frame"""
+        h, w = src.shape[0], src.shape[1]
+        for y in prange(h):
+            sy = np.intp(h - 1 - y) if flip_v else np.intp(y)
+            for x in range(w):
+                sx = np.intp(w - 1 - x) if flip_h else np.intp(x)
+                px = src[sy, sx]
+                b = np.float32(lut_bc[px[0]])
+                g = np.float32(lut_bc[px[1]])
+                r = np.float32(lut_bc[px[2]])
+
+                if sat_mul != 1.0:
+                    # Same as the OpenCV path: blend with the pixel's gray (BT.601 luma)
+                    l = np.float32(0.114) * b + np.float32(0.587) * g + np.float32(0.299) * r
+                    b = l + (b - l) * sat_mul
+                    g = l + (g - l) * sat_mul
+                    r = l + (r - l) * sat_mul
+
+                dst[y, x, 0] = np.uint8(min(max(b + 0.5, 0.0), 255.0))
+                dst[y, x, 1] = np.uint8(min(max(g + 0.5, 0.0), 255.0))
+                dst[y, x, 2] = np.uint8(min(max(r + 0.5, 0.0), 255.0))
+
 
 def apply_stabilization(frame):
     """Apply image stabilization using phase correlation"""
@@ -108,13 +273,35 @@ def apply_stabilization(frame):
 
     h, w = frame.shape[:2]
 
-    # Convert to grayscale for motion detection
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # Motion detection works on the green channel at half resolution - a
+    # translation doesn't need true luminance, and the DFT gets 4x smaller.
+    # The whole frame moves together, so only a center tile is correlated;
+    # shrinking the tile (not the scale) keeps sub-pixel precision.
+    # Detected shifts are scaled back up by 2.
+    small_h, small_w = min(h // 2, STABILIZE_TILE), min(w // 2, STABILIZE_TILE)
+    y0, x0 = (h - 2 * small_h) // 2, (w - 2 * small_w) // 2
+    gray = cv2.resize(cv2.extractChannel(frame[y0:y0 + 2 * small_h, x0:x0 + 2 * small_w], 1),
+                      (small_w, small_h), interpolation=cv2.INTER_AREA)
+
+    # phaseCorrelate wants float32 and pads both inputs to an optimal DFT size
+    # on every call; keep two buffers that are already padded (with zeros) and
+    # alternate between them, so each frame is one uint8 -> float32 copy
+    if stabilization_state['float_size'] != (small_h, small_w):
+        dft_shape = (cv2.getOptimalDFTSize(small_h), cv2.getOptimalDFTSize(small_w))
+        with stabilization_lock:
+            stabilization_state['float_pair'] = (np.zeros(dft_shape, np.float32),
+                                                  np.zeros(dft_shape, np.float32))
+            stabilization_state['float_size'] = (small_h, small_w)
+            stabilization_state['prev_float'] = None
+    pair = stabilization_state['float_pair']
+    prev_float = stabilization_state['prev_float']
+    curr_float = pair[1] if prev_float is pair[0] else pair[0]
+    np.copyto(curr_float[:small_h, :small_w], gray)
 
     # If this is the first frame, just store it
-    if stabilization_state['prev_gray'] is None:
+    if prev_float is None:
         with stabilization_lock:
-            stabilization_state['prev_gray'] = gray.copy()
+            stabilization_state['prev_float'] = curr_float
         # Draw indicator even on first frame
         stabilized = frame.copy()
         cv2.putText(stabilized, "STABILIZE: INIT", (10, 30),
@@ -128,14 +315,10 @@ def apply_stabilization(frame):
 
     # Use phase correlation to detect shift between frames
     try:
-        # Convert to float32 for phase correlation
-        prev_float = stabilization_state['prev_gray'].astype(np.float32)
-        curr_float = gray.astype(np.float32)
-
         # Calculate phase correlation - returns how much curr shifted from prev
         shift, response = cv2.phaseCorrelate(prev_float, curr_float)
 
-        dx, dy = shift
+        dx, dy = shift[0] * 2, shift[1] * 2  # Back to full-resolution pixels
         detected_dx, detected_dy = dx, dy
 
         # Get settings
@@ -183,11 +366,24 @@ def apply_stabilization(frame):
                 correction_x = stabilization_state['smooth_correction_x']
                 correction_y = stabilization_state['smooth_correction_y']
 
-            # Create transformation matrix - apply OPPOSITE of detected motion
-            M = np.float32([[1, 0, correction_x], [0, 1, correction_y]])
-
-            # Apply the transformation
-            stabilized = cv2.warpAffine(frame, M, (w, h), borderMode=cv2.BORDER_REPLICATE)
+            ix, iy = round(correction_x), round(correction_y)
+            if abs(correction_x - ix) < 0.1 and abs(correction_y - iy) < 0.1:
+                # Whole-pixel shift - crop and replicate the edges instead of interpolating
+                src = frame[max(-iy, 0):h - max(iy, 0), max(-ix, 0):w - max(ix, 0)]
+                stabilized = cv2.copyMakeBorder(src, max(iy, 0), max(-iy, 0), max(ix, 0), max(-ix, 0),
+                                                cv2.BORDER_REPLICATE,
+                                                dst=get_frame_buffer(frame.shape, frame))
+            else:
+                # Translation matrix - apply OPPOSITE of detected motion (reused, only the offsets change)
+                M = stabilization_state['warp_matrix']
+                if M is None:
+                    M = stabilization_state['warp_matrix'] = np.float32([[1, 0, 0], [0, 1, 0]])
+                M[0, 2] = correction_x
+                M[1, 2] = correction_y
+
+                # Apply the transformation into a pooled buffer
+                stabilized = cv2.warpAffine(frame, M, (w, h), dst=get_frame_buffer(frame.shape, frame),
+                                            borderMode=cv2.BORDER_REPLICATE)
         else:
             # Shift too large, probably scene change - reset
             with stabilization_lock:
@@ -195,36 +391,29 @@ def apply_stabilization(frame):
                 stabilization_state['accumulated_y'] = 0.0
                 stabilization_state['smooth_correction_x'] = 0.0
                 stabilization_state['smooth_correction_y'] = 0.0
-                stabilization_state['frame_buffer'] = []  # Clear buffer on scene change
+                stabilization_state['blend_accum'] = None  # Restart blending on scene change
             stabilized = frame.copy()
 
     except Exception:
         stabilized = frame.copy()
 
-    # Update previous frame
+    # Update previous frame (the other buffer is overwritten next time)
     with stabilization_lock:
-        stabilization_state['prev_gray'] = gray.copy()
+        stabilization_state['prev_float'] = curr_float
 
     # Apply frame blending to reduce tearing artifacts
     blend_count = stabilization_state['blend_frames']
     if blend_count > 1:
+        # Running exponential average, weighted like a blend_count-frame window
+        # (newest frame counts most) - one OpenCV pass, no frame history
+        alpha = 2.0 / (blend_count + 1)
         with stabilization_lock:
-            # Add current frame to buffer
-            stabilization_state['frame_buffer'].append(stabilized.astype(np.float32))
-
-            # Keep only the last N frames
-            if len(stabilization_state['frame_buffer']) > blend_count:
-                stabilization_state['frame_buffer'] = stabilization_state['frame_buffer'][-blend_count:]
-
-            # Blend frames together (weighted average, newer frames get more weight)
-            if len(stabilization_state['frame_buffer']) >= 2:
-                blended = np.zeros_like(stabilized, dtype=np.float32)
-                total_weight = 0
-                for i, buf_frame in enumerate(stabilization_state['frame_buffer']):
-                    weight = i + 1  # Newer frames get higher weight
-                    blended += buf_frame * weight
-                    total_weight += weight
-                stabilized = (blended / total_weight).astype(np.uint8)
+            accum = stabilization_state['blend_accum']
+            if accum is None or accum.shape != stabilized.shape:
+                stabilization_state['blend_accum'] = stabilized.astype(np.float32)
+            else:
+                cv2.accumulateWeighted(stabilized, accum, alpha)
+                cv2.convertScaleAbs(accum, dst=stabilized)
 
     # Draw visual indicator showing stabilization is active
     cv2.rectangle(stabilized, (5, 5), (250, 75), (0, 0, 0), -1)  # Black background
@@ -252,99 +441,339 @@ def reset_stabilization():
     """Reset stabilization state (call when toggling off or scene changes)"""
     global stabilization_state
     with stabilization_lock:
-        stabilization_state['prev_gray'] = None
+        stabilization_state['prev_float'] = None
         stabilization_state['accumulated_x'] = 0.0
         stabilization_state['accumulated_y'] = 0.0
         stabilization_state['smooth_correction_x'] = 0.0
         stabilization_state['smooth_correction_y'] = 0.0
-        stabilization_state['frame_buffer'] = []
+        stabilization_state['blend_accum'] = None
 
 
-def apply_image_processing(frame):
-    """Apply all image processing in Python using OpenCV"""
-    global processing_settings
+def get_processing_lut(settings):
+    """Return the brightness/contrast/gain table for the given settings, rebuilt only on change"""
+    signature = (settings['brightness'], settings['contrast'], settings['gain'])
+    if lut_cache['signature'] != signature:
+        values = np.arange(256, dtype=np.float32)
 
-    with processing_lock:
-        settings = processing_settings.copy()
+        # Brightness/contrast, then gain (software exposure) on the clipped result
+        bc = np.clip(np.rint(values * settings['contrast'] + settings['brightness']), 0, 255)
+        bc = np.clip(np.rint(bc * settings['gain']), 0, 255)
+        lut_cache['bc'] = bc.astype(np.uint8)
 
-    # Start with original frame as uint8
-    processed = frame
+        lut_cache['signature'] = signature
+    return lut_cache['bc']
 
-    # 0. Apply stabilization first (if enabled)
-    if settings['stabilize']:
-        processed = apply_stabilization(processed)
 
-    # 1. Apply brightness and contrast (if needed)
-    if settings['brightness'] != 0 or settings['contrast'] != 1.0:
-        processed = cv2.convertScaleAbs(
-            processed,
-            alpha=settings['contrast'],
-            beta=settings['brightness']
-        )
+def apply_color_adjustments(image, settings):
+    """Apply brightness/contrast/gain and saturation - each stage skipped at identity"""
+    out = None  # Pooled output buffer; later stages work on it in place
 
-    # 1.5 Apply gain (software exposure) if needed
-    if settings['gain'] != 1.0:
-        processed = cv2.convertScaleAbs(processed, alpha=settings['gain'], beta=0)
+    # Brightness, contrast and gain - single uint8 table lookup
+    if settings['brightness'] != 0 or settings['contrast'] != 1.0 or settings['gain'] != 1.0:
+        out = cv2.LUT(image, get_processing_lut(settings), dst=get_frame_buffer(image.shape, image))
 
-    # 2. Apply saturation (if needed)
+    # Saturation - blend each pixel with its own gray: out = gray + (bgr - gray) * s.
+    # One cvtColor + one addWeighted instead of a BGR->HSV->BGR round trip.
     if settings['saturation'] != 1.0:
-        # Convert to HSV to adjust saturation
-        hsv = cv2.cvtColor(processed, cv2.COLOR_BGR2HSV)
-        hsv = hsv.astype(np.float32)
-        hsv[:, :, 1] = np.clip(hsv[:, :, 1] * settings['saturation'], 0, 255)
-        processed = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-
-    # 3. Apply flip
-    if settings['flip_h'] and settings['flip_v']:
-        processed = cv2.flip(processed, -1)  # Both axes
-    elif settings['flip_h']:
-        processed = cv2.flip(processed, 1)   # Horizontal
-    elif settings['flip_v']:
-        processed = cv2.flip(processed, 0)   # Vertical
-
-    # 4. Apply rotation
-    rotation = int(settings['rotate']) % 360
+        saturation = settings['saturation']
+        src = image if out is None else out
+        gray = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=get_frame_buffer(image.shape[:2]))
+        gray3 = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=get_frame_buffer(image.shape, image, src))
+        if out is None:
+            out = get_frame_buffer(image.shape, image, gray3)
+        cv2.addWeighted(src, saturation, gray3, 1.0 - saturation, 0.0, dst=out)
+
+    return image if out is None else out
+
+
+def color_commutes_with_resize(settings):
+    """True if the color adjustments never clip, so averaging pixels before or after them agrees"""
+    low = settings['brightness']
+    high = 255 * settings['contrast'] + low  # Contrast is always positive
+    return (low >= 0 and high <= 255 and high * settings['gain'] <= 255
+            and settings['saturation'] <= 1.0)  # Desaturation only blends toward gray
+
+
+def geometry_matrix(flip_h, flip_v, rotation, w, h):
+    """3x3 matrix mapping input pixel indices to flipped-then-rotated pixel indices"""
+    m = np.eye(3)
+    if flip_h:
+        m = np.array([[-1, 0, w - 1], [0, 1, 0], [0, 0, 1]]) @ m
+    if flip_v:
+        m = np.array([[1, 0, 0], [0, -1, h - 1], [0, 0, 1]]) @ m
     if rotation == 90:
-        processed = cv2.rotate(processed, cv2.ROTATE_90_CLOCKWISE)
+        m = np.array([[0, -1, h - 1], [1, 0, 0], [0, 0, 1]]) @ m
     elif rotation == 180:
-        processed = cv2.rotate(processed, cv2.ROTATE_180)
+        m = np.array([[-1, 0, w - 1], [0, -1, h - 1], [0, 0, 1]]) @ m
     elif rotation == 270:
-        processed = cv2.rotate(processed, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        m = np.array([[0, 1, 0], [-1, 0, w - 1], [0, 0, 1]]) @ m
+    return m
+
+
+# Flip-then-rotate collapsed to the single equivalent operation, so cancelling
+# combinations (e.g. the default flip_h + flip_v with rotate 180) cost nothing
+GEOMETRY_TABLE = {
+    (False, False, 0): None,     (False, False, 90): 'rot90',
+    (False, False, 180): 'rot180', (False, False, 270): 'rot270',
+    (False, True, 0): 'flip_v',  (False, True, 90): 'transpose',
+    (False, True, 180): 'flip_h', (False, True, 270): 'transverse',
+    (True, False, 0): 'flip_h',  (True, False, 90): 'transverse',
+    (True, False, 180): 'flip_v', (True, False, 270): 'transpose',
+    (True, True, 0): 'rot180',   (True, True, 90): 'rot270',
+    (True, True, 180): None,     (True, True, 270): 'rot90'
+}
 
-    # 5. Apply zoom (center crop and resize) - if needed
-    zoom = settings['zoom']
-    if zoom != 1.0:
-        h, w = processed.shape[:2]
-
-        if zoom > 1.0:
-            # Zoom in - crop from center and resize back
-            crop_h = int(h / zoom)
-            crop_w = int(w / zoom)
-            start_y = (h - crop_h) // 2
-            start_x = (w - crop_w) // 2
-            cropped = processed[start_y:start_y+crop_h, start_x:start_x+crop_w]
-            # Use INTER_NEAREST for speed on Pi, INTER_LINEAR for quality on desktop
-            processed = cv2.resize(cropped, (w, h), interpolation=cv2.INTER_LINEAR)
+GEOMETRY_OPS = {
+    'flip_h': lambda src, dst: cv2.flip(src, 1, dst=dst),
+    'flip_v': lambda src, dst: cv2.flip(src, 0, dst=dst),
+    'rot180': lambda src, dst: cv2.flip(src, -1, dst=dst),
+    'rot90': lambda src, dst: cv2.rotate(src, cv2.ROTATE_90_CLOCKWISE, dst=dst),
+    'rot270': lambda src, dst: cv2.rotate(src, cv2.ROTATE_90_COUNTERCLOCKWISE, dst=dst),
+    'transpose': lambda src, dst: cv2.transpose(src, dst=dst),
+    # Anti-diagonal mirror - the one case with no single OpenCV call
+    'transverse': lambda src, dst: cv2.flip(
+        cv2.transpose(src, dst=get_frame_buffer(dst.shape, src, dst)), -1, dst=dst)
+}
+
+
+def apply_geometry(src, flip_h, flip_v, rotation, dst=None):
+    """Flip then rotate src into dst (a pooled buffer if dst is None)"""
+    op = GEOMETRY_TABLE[(flip_h, flip_v, rotation)]
+
+    if dst is None:
+        if op is None:
+            return src
+        if rotation in (90, 270):
+            out_shape = (src.shape[1], src.shape[0]) + src.shape[2:]
         else:
-            # Zoom out - resize smaller and pad with black
-            new_h = int(h * zoom)
-            new_w = int(w * zoom)
-            resized = cv2.resize(processed, (new_w, new_h), interpolation=cv2.INTER_AREA)
-            processed = np.zeros((h, w, 3), dtype=np.uint8)
-            start_y = (h - new_h) // 2
-            start_x = (w - new_w) // 2
-            processed[start_y:start_y+new_h, start_x:start_x+new_w] = resized
+            out_shape = src.shape
+        dst = get_frame_buffer(out_shape, src)
+
+    if op is None:
+        np.copyto(dst, src)
+    else:
+        GEOMETRY_OPS[op](src, dst)
+    return dst
+
+
+def debug_log(message):
+    """Timestamped trace line, printed only with MICROSCOPE_DEBUG=1"""
+    if DEBUG:
+        print(f"[{datetime.now().isoformat()}] PYTHON: {message}")
+
+
+def settings_changed():
+    """Mark processing_settings as modified so the capture thread re-reads them"""
+    global settings_version
+    with processing_lock:
+        settings_version += 1
+
+
+# Slider settings as sent by the page: name -> (state key, divisor). Sliders
+# send integers; a divisor of 1 keeps the value an int.
+SLIDER_SETTINGS = {
+    'brightness': ('brightness', 1),   # -100 to 100
+    'contrast': ('contrast', 100),     # 10-300 -> 0.1-3.0
+    'saturation': ('saturation', 100), # 0-300 -> 0.0-3.0
+    'zoom': ('zoom', 100),             # 50-400 -> 0.5-4.0
+    'gain': ('gain', 100),             # 20-300 -> 0.2-3.0
+}
+STABILIZATION_SLIDERS = {
+    'stab_noise': ('noise_threshold', 10),        # 0-30 -> 0.0-3.0
+    'stab_smooth': ('correction_smoothing', 100), # 0-90 -> 0.0-0.9
+    'stab_decay': ('decay', 100),                 # 30-95 -> 0.3-0.95
+    'stab_blend': ('blend_frames', 1),            # 1-5 frames
+}
+
+
+def apply_slider_settings(changes):
+    """Apply {slider name: raw value} in one go; returns the converted values (ValueError/KeyError if invalid)"""
+    converted = {}
+    for name, raw in changes.items():
+        divisor = (SLIDER_SETTINGS.get(name) or STABILIZATION_SLIDERS[name])[1]
+        converted[name] = int(raw) if divisor == 1 else int(raw) / divisor
+
+    with processing_lock:
+        for name, value in converted.items():
+            if name in SLIDER_SETTINGS:
+                processing_settings[SLIDER_SETTINGS[name][0]] = value
+    with stabilization_lock:
+        for name, value in converted.items():
+            if name in STABILIZATION_SLIDERS:
+                stabilization_state[STABILIZATION_SLIDERS[name][0]] = value
+        if 'stab_blend' in converted:
+            stabilization_state['blend_accum'] = None  # Restart blending when changing
+    settings_changed()
+    return converted
+
+
+def set_capture_fps(value):
+    global capture_fps
+    capture_fps = value
+
+
+def set_jpeg_quality(value):
+    global jpeg_quality
+    jpeg_quality = value
+
+
+def set_exposure(value):
+    global exposure_value
+    exposure_value = value
+    # Apply to camera if available
+    if usb_camera_cap is not None:
+        usb_camera_cap.set(cv2.CAP_PROP_EXPOSURE, value)
+
+
+# Integer capture settings: name -> (min, max, setter, log label)
+CAPTURE_SETTINGS = {
+    'fps': (1, 30, set_capture_fps, 'Capture FPS'),
+    'quality': (10, 100, set_jpeg_quality, 'JPEG quality'),
+    'exposure': (-13, 0, set_exposure, 'Exposure'),
+}
+
+
+def is_identity_settings(settings):
+    """True if these settings leave a frame untouched"""
+    return (settings['brightness'] == 0 and settings['contrast'] == 1.0
+            and settings['saturation'] == 1.0 and settings['gain'] == 1.0
+            and GEOMETRY_TABLE[(settings['flip_h'], settings['flip_v'],
+                                int(settings['rotate']) % 360)] is None  # Incl. cancelling pairs
+            and settings['zoom'] == 1.0 and not settings['stabilize'])
+
+
+def current_settings():
+    """Return (settings snapshot, is_identity) - re-read only after settings_changed()"""
+    global settings_snapshot
+    snapshot = settings_snapshot
+    if snapshot[0] != settings_version:
+        with processing_lock:
+            settings = processing_settings.copy()
+            version = settings_version
+        snapshot = (version, settings, is_identity_settings(settings))
+        settings_snapshot = snapshot
+    return snapshot[1], snapshot[2]
+
+
+def apply_image_processing(frame):
+    """Apply all image processing in Python using OpenCV"""
+    settings, identity = current_settings()
+    if identity:
+        return frame
+
+    # The input may itself be pooled (TurboJPEG decode); keep every stage,
+    # not just the first, from writing its output over it
+    pinned_frames[:] = [frame]
+
+    # Start with original frame as uint8. Every stage below writes into a
+    # pooled buffer (dst=...) so steady-state processing allocates nothing.
+    # Decoded frames are always C-contiguous; anything else is copied once
+    # here rather than leaving OpenCV/Numba to fall back to strided code.
+    processed = frame if frame.flags.c_contiguous else np.ascontiguousarray(frame)
+
+    # 0. Apply stabilization first (if enabled)
+    if settings['stabilize']:
+        processed = apply_stabilization(processed)
+
+    rotation = int(settings['rotate']) % 360
+
+    # Fast path: flip + color adjustments fused into one Numba pass
+    color_active = (settings['brightness'] != 0 or settings['contrast'] != 1.0
+                    or settings['gain'] != 1.0 or settings['saturation'] != 1.0)
+    if (NUMBA_AVAILABLE and color_active and rotation == 0 and settings['zoom'] == 1.0
+            and processed.ndim == 3):
+        bc_lut = get_processing_lut(settings)
+        out = get_frame_buffer(processed.shape, processed)
+        fused_process(processed, out, bc_lut, float(settings['saturation']),
+                      bool(settings['flip_h']), bool(settings['flip_v']))
+        return out
+
+    flip_h, flip_v = settings['flip_h'], settings['flip_v']
+    zoom = settings['zoom']
+
+    # Output size after rotation
+    in_h, in_w = processed.shape[:2]
+    if rotation in (90, 270):
+        h, w = in_w, in_h
+    else:
+        h, w = in_h, in_w
+    out_shape = (h, w) + processed.shape[2:]
+
+    # Color adjustments are per-pixel, so they run on the smallest version of
+    # the visible image (zoom crop or downscaled frame) instead of the full frame
+    if zoom > 1.0:
+        # Zoom in - the crop is defined in output space; map it back into the
+        # input frame so color adjustments and flip/rotate only touch the crop
+        crop_h = int(h / zoom)
+        crop_w = int(w / zoom)
+        start_y = (h - crop_h) // 2
+        start_x = (w - crop_w) // 2
+
+        to_input = np.linalg.inv(geometry_matrix(flip_h, flip_v, rotation, in_w, in_h))
+        corners = to_input @ np.array([[start_x, start_x + crop_w - 1],
+                                       [start_y, start_y + crop_h - 1],
+                                       [1, 1]], dtype=np.float64)
+        x0 = int(round(corners[0].min()))
+        y0 = int(round(corners[1].min()))
+        x1 = int(round(corners[0].max())) + 1
+        y1 = int(round(corners[1].max())) + 1
+        cropped = apply_color_adjustments(processed[y0:y1, x0:x1], settings)
+        cropped = apply_geometry(cropped, flip_h, flip_v, rotation)
+
+        # Use INTER_NEAREST for speed on Pi, INTER_LINEAR for quality on desktop
+        processed = cv2.resize(cropped, (w, h), interpolation=cv2.INTER_LINEAR,
+                               dst=get_frame_buffer(out_shape, processed, cropped))
+    elif zoom < 1.0:
+        # Zoom out - shrink (INTER_AREA, a warp would alias), then flip/rotate
+        # straight into the center of the black frame. Color adjustments run on
+        # the shrunk image when that gives the same result; clipping ones must
+        # see the full-resolution pixels, before they are averaged together.
+        new_h = int(h * zoom)
+        new_w = int(w * zoom)
+        small_w, small_h = (new_h, new_w) if rotation in (90, 270) else (new_w, new_h)
+        color_first = color_active and not color_commutes_with_resize(settings)
+        source = apply_color_adjustments(processed, settings) if color_first else processed
+        resized = cv2.resize(source, (small_w, small_h), interpolation=cv2.INTER_AREA,
+                             dst=get_frame_buffer((small_h, small_w) + processed.shape[2:],
+                                                  processed, source))
+        if not color_first:
+            resized = apply_color_adjustments(resized, settings)
+
+        start_y = (h - new_h) // 2
+        start_x = (w - new_w) // 2
+        padded = get_frame_buffer(out_shape, processed, resized)
+        # Only the border needs clearing - the center is overwritten below
+        padded[:start_y] = 0
+        padded[start_y+new_h:] = 0
+        padded[start_y:start_y+new_h, :start_x] = 0
+        padded[start_y:start_y+new_h, start_x+new_w:] = 0
+        apply_geometry(resized, flip_h, flip_v, rotation,
+                       dst=padded[start_y:start_y+new_h, start_x:start_x+new_w])
+        processed = padded
+    else:
+        processed = apply_geometry(processed, flip_h, flip_v, rotation)
+        processed = apply_color_adjustments(processed, settings)
 
     return processed
 
-class MicroscopeHandler(SimpleHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/':
-            # Serve the HTML viewer
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html = """<!DOCTYPE html>
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip (explicitly or via *) with q > 0"""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.strip().lower()] = q
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+# Viewer page, encoded (and gzipped) once at startup
+INDEX_HTML = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -788,9 +1217,131 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const mobileToggle = document.getElementById('mobile-toggle');
         const mobileOverlay = document.getElementById('mobile-overlay');
 
+        // Console traces only with ?debug in the page URL
+        const DEBUG = new URLSearchParams(window.location.search).has('debug');
+        function debugLog(message) {
+            if (DEBUG) {
+                console.log(`[${new Date().toISOString()}] BROWSER: ${message}`);
+            }
+        }
+
+        // Slider labels: input handlers only record the text, one animation
+        // frame writes all changed labels, however fast the input events come
+        const pendingDisplay = new Map();
+        let displayScheduled = false;
+        function showValue(element, text) {
+            pendingDisplay.set(element, text);
+            if (!displayScheduled) {
+                displayScheduled = true;
+                requestAnimationFrame(flushDisplay);
+            }
+        }
+
+        function flushDisplay() {
+            pendingDisplay.forEach((text, element) => {
+                element.textContent = text;
+            });
+            pendingDisplay.clear();
+            displayScheduled = false;
+        }
+
         let frameCount = 0;
+        let framesLoaded = 0;  // Never reset; lets the recorder skip repeated frames
+        let streamLoads = 0;   // Load events since the last img.src change
         let lastFpsUpdate = Date.now();
 
+        // Trailing-edge throttle: the first call runs at once, further calls
+        // within `wait` ms collapse into one that runs when it expires. The
+        // handler reads this.value when it runs, so the final position is used.
+        function throttle(fn, wait) {
+            let timer = null;
+            let last = 0;
+            let ctx, args;
+            return function() {
+                ctx = this;
+                args = arguments;
+                if (timer) return;
+                const run = () => {
+                    timer = null;
+                    last = Date.now();
+                    fn.apply(ctx, args);
+                };
+                const remaining = last + wait - Date.now();
+                if (remaining <= 0) {
+                    run();
+                } else {
+                    timer = setTimeout(run, remaining);
+                }
+            };
+        }
+
+        // One POST per setting at a time: a value chosen while the previous one
+        // is still in flight waits, and only the newest waiting value is sent
+        const inflightPosts = new Map();
+        const pendingPosts = new Map();
+        function postSetting(name, url) {
+            if (inflightPosts.has(name)) {
+                pendingPosts.set(name, url);
+                return Promise.resolve(null);
+            }
+            const request = fetch(url, { method: 'POST' }).finally(() => {
+                inflightPosts.delete(name);
+                const next = pendingPosts.get(name);
+                if (next) {
+                    pendingPosts.delete(name);
+                    postSetting(name, next)
+                        .catch(err => console.error(`Failed to set ${name}:`, err));
+                }
+            });
+            inflightPosts.set(name, request);
+            return request;
+        }
+
+        // Slider values for /process are collected for SETTINGS_BATCH_MS and
+        // sent together as one JSON POST. /process requests (batches and
+        // resets) go out one at a time in order, and a batch takes whatever
+        // values have collected by the time it is sent, so values chosen while
+        // a request is in flight coalesce into the next one.
+        const SETTINGS_BATCH_MS = 50;
+        const pendingChanges = {};
+        let batchTimer = null;
+        let settingsQueue = Promise.resolve();
+        function sendInOrder(send) {
+            settingsQueue = settingsQueue.then(send)
+                .catch(err => console.error('Failed to apply settings:', err));
+            return settingsQueue;
+        }
+
+        function queueSetting(name, value) {
+            pendingChanges[name] = value;
+            if (!batchTimer) {
+                batchTimer = setTimeout(flushSettings, SETTINGS_BATCH_MS);
+            }
+        }
+
+        function flushSettings() {
+            batchTimer = null;
+            sendInOrder(() => {
+                if (!Object.keys(pendingChanges).length) {
+                    return;  // Already sent with an earlier batch
+                }
+                const body = JSON.stringify(pendingChanges);
+                Object.keys(pendingChanges).forEach(name => delete pendingChanges[name]);
+                return fetch('/process/batch', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: body
+                });
+            });
+        }
+
+        // A reset drops queued values of the settings it resets and is sent
+        // after any batch already on its way, so no batch can undo it
+        function postReset(url, names) {
+            names.forEach(name => delete pendingChanges[name]);
+            return sendInOrder(() => fetch(url, { method: 'POST' }));
+        }
+
         // Mobile sidebar toggle
         function toggleSidebar() {
             const isHidden = sidebar.classList.toggle('mobile-hidden');
@@ -824,21 +1375,49 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
 
         handleResize();
 
-        let resizeTimeout;
-        window.addEventListener('resize', function() {
-            clearTimeout(resizeTimeout);
-            resizeTimeout = setTimeout(handleResize, 100);
-        });
+        // Resize events are throttled to one callback per animation frame
+        // (setTimeout fallback where requestAnimationFrame is missing)
+        const optimizedResize = (function() {
+            const callbacks = [];
+            let running = false;
+
+            function runCallbacks() {
+                callbacks.forEach(callback => callback());
+                running = false;
+            }
+
+            function resize() {
+                if (running) return;
+                running = true;
+                if (window.requestAnimationFrame) {
+                    window.requestAnimationFrame(runCallbacks);
+                } else {
+                    setTimeout(runCallbacks, 66);
+                }
+            }
+
+            return {
+                add: function(callback) {
+                    if (!callbacks.length) {
+                        window.addEventListener('resize', resize);
+                    }
+                    callbacks.push(callback);
+                }
+            };
+        })();
+
+        optimizedResize.add(handleResize);
 
         // Track actual FPS
         img.addEventListener('load', function() {
             frameCount++;
+            framesLoaded++;
+            streamLoads++;
             const now = Date.now();
 
             // Debug every 30 frames
             if (frameCount % 30 === 0) {
-                const timestamp = new Date().toISOString();
-                console.log(`[${timestamp}] BROWSER: Received and displayed frame ${frameCount}`);
+                debugLog(`Received and displayed frame ${frameCount}`);
             }
 
             if (now - lastFpsUpdate >= 1000) {
@@ -852,21 +1431,12 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const brightnessSlider = document.getElementById('brightness-slider');
         const brightnessValue = document.getElementById('brightness-value');
         brightnessSlider.addEventListener('input', function() {
-            brightnessValue.textContent = this.value;
+            showValue(brightnessValue, this.value);
         });
         brightnessSlider.addEventListener('change', function() {
             const value = this.value;
-            const timestamp = new Date().toISOString();
-            console.log(`[${timestamp}] BROWSER: Sending brightness=${value} to server`);
-            fetch(`/process/brightness/${value}`, { method: 'POST' })
-                .then(response => {
-                    const ts = new Date().toISOString();
-                    console.log(`[${ts}] BROWSER: Server responded OK to brightness change`);
-                })
-                .catch(err => {
-                    const ts = new Date().toISOString();
-                    console.error(`[${ts}] BROWSER: Failed to set brightness:`, err);
-                });
+            debugLog(`Sending brightness=${value} to server`);
+            queueSetting('brightness', value);
         });
 
         // Contrast slider (display as 0.1-3.0, send as 10-300)
@@ -874,12 +1444,11 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const contrastValue = document.getElementById('contrast-value');
         contrastSlider.addEventListener('input', function() {
             const displayValue = (this.value / 100).toFixed(1);
-            contrastValue.textContent = displayValue;
+            showValue(contrastValue, displayValue);
         });
         contrastSlider.addEventListener('change', function() {
             const value = this.value;
-            fetch(`/process/contrast/${value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set contrast:', err));
+            queueSetting('contrast', value);
         });
 
         // Saturation slider (display as 0.0-3.0, send as 0-300)
@@ -887,22 +1456,19 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const saturationValue = document.getElementById('saturation-value');
         saturationSlider.addEventListener('input', function() {
             const displayValue = (this.value / 100).toFixed(1);
-            saturationValue.textContent = displayValue;
+            showValue(saturationValue, displayValue);
         });
         saturationSlider.addEventListener('change', function() {
             const value = this.value;
-            fetch(`/process/saturation/${value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set saturation:', err));
+            queueSetting('saturation', value);
         });
 
         // Flip controls
         function flipHorizontal() {
-            const timestamp = new Date().toISOString();
-            console.log(`[${timestamp}] BROWSER: Sending flip_h toggle to server`);
+            debugLog('Sending flip_h toggle to server');
             fetch('/process/flip_h/toggle', { method: 'POST' })
                 .then(response => {
-                    const ts = new Date().toISOString();
-                    console.log(`[${ts}] BROWSER: Server responded OK to flip_h`);
+                    debugLog('Server responded OK to flip_h');
                 })
                 .catch(err => {
                     const ts = new Date().toISOString();
@@ -911,12 +1477,10 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         }
 
         function flipVertical() {
-            const timestamp = new Date().toISOString();
-            console.log(`[${timestamp}] BROWSER: Sending flip_v toggle to server`);
+            debugLog('Sending flip_v toggle to server');
             fetch('/process/flip_v/toggle', { method: 'POST' })
                 .then(response => {
-                    const ts = new Date().toISOString();
-                    console.log(`[${ts}] BROWSER: Server responded OK to flip_v`);
+                    debugLog('Server responded OK to flip_v');
                 })
                 .catch(err => {
                     const ts = new Date().toISOString();
@@ -951,38 +1515,34 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
 
         stabNoiseSlider.addEventListener('input', function() {
             const value = (this.value / 10).toFixed(1);
-            stabNoiseValue.textContent = value;
+            showValue(stabNoiseValue, value);
         });
         stabNoiseSlider.addEventListener('change', function() {
             const value = this.value / 10;
-            fetch(`/process/stab_noise/${this.value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set noise threshold:', err));
+            queueSetting('stab_noise', this.value);
         });
 
         stabSmoothSlider.addEventListener('input', function() {
             const value = (this.value / 100).toFixed(2);
-            stabSmoothValue.textContent = value;
+            showValue(stabSmoothValue, value);
         });
         stabSmoothSlider.addEventListener('change', function() {
-            fetch(`/process/stab_smooth/${this.value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set smoothing:', err));
+            queueSetting('stab_smooth', this.value);
         });
 
         stabDecaySlider.addEventListener('input', function() {
             const value = (this.value / 100).toFixed(2);
-            stabDecayValue.textContent = value;
+            showValue(stabDecayValue, value);
         });
         stabDecaySlider.addEventListener('change', function() {
-            fetch(`/process/stab_decay/${this.value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set decay:', err));
+            queueSetting('stab_decay', this.value);
         });
 
         stabBlendSlider.addEventListener('input', function() {
-            stabBlendValue.textContent = this.value;
+            showValue(stabBlendValue, this.value);
         });
         stabBlendSlider.addEventListener('change', function() {
-            fetch(`/process/stab_blend/${this.value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set frame blend:', err));
+            queueSetting('stab_blend', this.value);
         });
 
         function resetStabilizeSettings() {
@@ -997,8 +1557,7 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
             stabBlendValue.textContent = '2';
 
             // Send reset request to server
-            fetch('/process/stab_reset/1', { method: 'POST' })
-                .catch(err => console.error('Failed to reset stabilization settings:', err));
+            postReset('/process/stab_reset/1', ['stab_noise', 'stab_smooth', 'stab_decay', 'stab_blend']);
         }
 
         // Rotation controls
@@ -1014,12 +1573,11 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
 
         // Zoom controls
         zoomSlider.addEventListener('input', function() {
-            zoomValue.textContent = this.value + '%';
+            showValue(zoomValue, this.value + '%');
         });
         zoomSlider.addEventListener('change', function() {
             const value = this.value;
-            fetch(`/process/zoom/${value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set zoom:', err));
+            queueSetting('zoom', value);
         });
 
         function zoomIn() {
@@ -1040,11 +1598,11 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const captureFpsSlider = document.getElementById('capture-fps-slider');
         const captureFpsValue = document.getElementById('capture-fps-value');
         captureFpsSlider.addEventListener('input', function() {
-            captureFpsValue.textContent = this.value;
+            showValue(captureFpsValue, this.value);
         });
         captureFpsSlider.addEventListener('change', function() {
             const value = this.value;
-            fetch(`/capture/fps/${value}`, { method: 'POST' })
+            postSetting('fps', `/capture/fps/${value}`)
                 .catch(err => console.error('Failed to set capture FPS:', err));
         });
 
@@ -1052,31 +1610,34 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         const qualitySlider = document.getElementById('quality-slider');
         const qualityValue = document.getElementById('quality-value');
         qualitySlider.addEventListener('input', function() {
-            qualityValue.textContent = this.value;
+            showValue(qualityValue, this.value);
         });
         qualitySlider.addEventListener('change', function() {
             const value = this.value;
-            fetch(`/capture/quality/${value}`, { method: 'POST' })
+            postSetting('quality', `/capture/quality/${value}`)
                 .catch(err => console.error('Failed to set JPEG quality:', err));
         });
 
         // Stream FPS slider
         fpsSlider.addEventListener('input', function() {
-            const value = this.value;
-            fpsValue.textContent = value;
-            img.src = '/stream.mjpg?fps=' + value + '&t=' + Date.now();
+            showValue(fpsValue, this.value);
         });
+        // Reconnect only once the slider is released - not once per drag step -
+        // and at most every 500ms when stepped with the keyboard
+        fpsSlider.addEventListener('change', throttle(function() {
+            streamLoads = 0;
+            img.src = '/stream.mjpg?fps=' + this.value + '&t=' + Date.now();
+        }, 500));
 
         // Gain (software exposure) slider
         const gainSlider = document.getElementById('gain-slider');
         const gainValue = document.getElementById('gain-value');
 
         gainSlider.addEventListener('input', function() {
-            gainValue.textContent = (this.value / 100).toFixed(1);
+            showValue(gainValue, (this.value / 100).toFixed(1));
         });
         gainSlider.addEventListener('change', function() {
-            fetch(`/process/gain/${this.value}`, { method: 'POST' })
-                .catch(err => console.error('Failed to set gain:', err));
+            queueSetting('gain', this.value);
         });
 
         // Reset all settings
@@ -1093,8 +1654,7 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
             gainSlider.value = 100;
             gainValue.textContent = '1.0';
 
-            fetch('/process/reset', { method: 'POST' })
-                .catch(err => console.error('Failed to reset:', err));
+            postReset('/process/reset', ['brightness', 'contrast', 'saturation', 'zoom', 'gain']);
         }
 
         function takeScreenshot() {
@@ -1137,10 +1697,17 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
 
                 const stream = canvas.captureStream(29);
 
+                // The image is opaque and covers the whole canvas, so no clearRect;
+                // only draw when a new stream frame arrived. Browsers that fire load
+                // once per MJPEG stream (not per frame) never get past one load on
+                // the current stream, so draw every animation frame for them
                 let animationId;
+                let lastRecordedFrame = -1;
                 function drawFrame() {
-                    ctx.clearRect(0, 0, canvas.width, canvas.height);
-                    ctx.drawImage(img, 0, 0);
+                    if (streamLoads <= 1 || framesLoaded !== lastRecordedFrame) {
+                        ctx.drawImage(img, 0, 0);
+                        lastRecordedFrame = framesLoaded;
+                    }
 
                     if (mediaRecorder && mediaRecorder.state === 'recording') {
                         animationId = requestAnimationFrame(drawFrame);
@@ -1219,6 +1786,11 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
 
         // Keyboard shortcuts
         document.addEventListener('keydown', function(e) {
+            // Held keys repeat; only zoom may auto-repeat (its change handler is
+            // throttled and batched), toggles and screenshots fire once per press
+            const isZoomKey = ['+', '=', '-', '_'].includes(e.key);
+            if (e.repeat && !isZoomKey) return;
+
             if (e.key === 's' || e.key === 'S') {
                 takeScreenshot();
             } else if (e.key === 'r' || e.key === 'R') {
@@ -1241,340 +1813,285 @@ class MicroscopeHandler(SimpleHTTPRequestHandler):
         });
     </script>
 </body>
-</html>"""
-            self.wfile.write(html.encode('utf-8'))
-
-        elif self.path.startswith('/stream.mjpg'):
-            # Parse FPS from query string
-            fps = target_fps
-            if '?' in self.path:
-                query = self.path.split('?')[1]
-                for param in query.split('&'):
-                    if param.startswith('fps='):
-                        try:
-                            fps = int(param.split('=')[1])
-                            fps = max(1, min(29, fps))
-                        except:
-                            pass
-
-            # Serve MJPEG stream
+</html>""".encode('utf-8')
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML, 6)
+
+class MicroscopeHandler(SimpleHTTPRequestHandler):
+    # Exact-path GET routes; handlers get the parsed query string (parse_qs dict)
+    GET_ROUTES = {
+        '/': 'serve_index',
+        '/stream.mjpg': 'serve_stream',
+        '/current.jpg': 'serve_current_frame',
+    }
+
+    # Parametric POST routes, compiled once and tried in order (full-path match)
+    POST_ROUTES = [
+        (re.compile(r'/process/reset'), 'handle_process_reset'),
+        (re.compile(r'/process/batch'), 'handle_process_batch'),
+        (re.compile(r'/process/(\w+)/([^/]+)'), 'handle_process'),
+        (re.compile(r'/capture/(\w+)/([^/]+)'), 'handle_capture'),
+    ]
+
+    # HTTP/1.1 keeps connections open, so settings POSTs reuse one connection
+    # instead of a new TCP handshake each. Every response sends a
+    # Content-Length; the stream says Connection: close. Idle keep-alive
+    # connections are dropped after `timeout` seconds.
+    protocol_version = 'HTTP/1.1'
+    timeout = 60
+
+    def setup(self):
+        super().setup()
+        # No Nagle delay between frames, and room for a few frames in the send buffer
+        try:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        except OSError:
+            pass
+
+    def read_body(self):
+        """Read the request body so the next keep-alive request starts in sync; None if unreadable"""
+        if 'Transfer-Encoding' in self.headers:
+            return None  # Chunked bodies aren't supported
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            return None
+        if length < 0:
+            return None
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if self.read_body() is None:
+            self.send_status(400, close=True)
+            return
+        handler = self.GET_ROUTES.get(url.path)
+        if handler is None:
+            self.send_status(404)
+            return
+        getattr(self, handler)(parse_qs(url.query))
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        # Always consumed, even for requests that are rejected below
+        self.request_body = self.read_body()
+        if self.request_body is None:
+            self.send_status(400, close=True)
+            return
+        for pattern, handler in self.POST_ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                getattr(self, handler)(*match.groups())
+                return
+        self.send_status(404)
+
+    def send_json(self, body=b'{"status": "ok"}'):
+        """200 response with a JSON body"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_status(self, code, close=False):
+        """Bodyless response (404, 400, ...); close=True when the connection can't be reused"""
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        if close:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+
+    def serve_index(self, query):
+        # Serve the HTML viewer
+        body = INDEX_HTML
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        if accepts_gzip(self.headers.get('Accept-Encoding', '')):
+            body = INDEX_HTML_GZIP
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Vary', 'Accept-Encoding')
+        # Static page - let reloads within a minute come from the browser cache
+        self.send_header('Cache-Control', 'public, max-age=60')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_stream(self, query):
+        # FPS from the query string (?fps=N)
+        fps = target_fps
+        try:
+            fps = max(1, min(29, int(query['fps'][0])))
+        except (KeyError, ValueError):
+            pass
+
+        # Serve MJPEG stream
+        self.send_response(200)
+        self.send_header('Content-type', 'multipart/x-mixed-replace; boundary=frame')
+        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+        self.send_header('Pragma', 'no-cache')
+        self.send_header('Expires', '0')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        self.wfile.flush()
+
+        # Hand the socket to the broadcaster thread, which serves every viewer
+        # from one select() loop - this request thread returns straight away
+        add_stream_client(self.connection, fps)
+
+    def serve_current_frame(self, query):
+        # Serve a single current frame (for screenshot/debugging). With no
+        # stream open capture is idle, so wake it and wait for a new frame
+        frame, _, _ = fresh_frame(timeout=2.0)
+        if frame:
             self.send_response(200)
-            self.send_header('Content-type', 'multipart/x-mixed-replace; boundary=frame')
+            self.send_header('Content-type', 'image/jpeg')
             self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
             self.send_header('Pragma', 'no-cache')
             self.send_header('Expires', '0')
-            self.send_header('Connection', 'close')
+            self.send_header('Content-Length', str(len(frame)))
             self.end_headers()
-
-            # Disable buffering on the socket for immediate frame delivery
-            try:
-                import socket
-                self.wfile.flush()
-                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-            except:
-                pass
-
-            frame_delay = 1.0 / fps
-            last_frame_number = -1
-            stream_frame_count = 0
-
-            try:
-                last_send_time = time.time()
-
-                while running:
-                    with frame_lock:
-                        frame = current_frame
-                        frame_number = current_frame_number
-
-                    # Send frame if it's new (different frame number)
-                    if frame and frame_number != last_frame_number:
-                        # Check if enough time has elapsed
-                        elapsed = time.time() - last_send_time
-                        if elapsed < frame_delay:
-                            # Sleep in small increments to stay responsive
-                            time.sleep(min(0.01, frame_delay - elapsed))
-                            continue
-
-                        last_send_time = time.time()
-
-                        # Write MJPEG frame part by part with flushes
-                        try:
-                            self.wfile.write(b'--frame\r\n')
-                            self.wfile.flush()
-
-                            self.wfile.write(b'Content-Type: image/jpeg\r\n')
-                            self.wfile.flush()
-
-                            self.wfile.write(f'Content-Length: {len(frame)}\r\n\r\n'.encode())
-                            self.wfile.flush()
-
-                            self.wfile.write(frame)
-                            self.wfile.flush()
-
-                            self.wfile.write(b'\r\n')
-                            self.wfile.flush()
-                        except (BrokenPipeError, ConnectionResetError):
-                            # Client disconnected
-                            break
-
-                        last_frame_number = frame_number
-                        stream_frame_count += 1
-
-                        # Debug: Print every 30 frames sent
-                        if stream_frame_count % 30 == 0:
-                            timestamp = datetime.now().isoformat()
-                            print(f"[{timestamp}] PYTHON STREAM: Sent frame {stream_frame_count} to browser, frame_num={frame_number}")
-                    else:
-                        # No new frame, sleep briefly
-                        time.sleep(0.01)
-            except:
-                pass
-
-        elif self.path.startswith('/current.jpg'):
-            # Serve a single current frame (for screenshot/debugging)
-            with frame_lock:
-                if current_frame:
-                    self.send_response(200)
-                    self.send_header('Content-type', 'image/jpeg')
-                    self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-                    self.send_header('Pragma', 'no-cache')
-                    self.send_header('Expires', '0')
-                    self.end_headers()
-                    self.wfile.write(current_frame)
-                else:
-                    self.send_response(404)
-                    self.end_headers()
+            self.wfile.write(frame)
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_status(404)
+
+    def handle_process_reset(self):
+        """Reset all processing settings to defaults"""
+        with processing_lock:
+            processing_settings['brightness'] = 0
+            processing_settings['contrast'] = 1.0
+            processing_settings['saturation'] = 1.0
+            processing_settings['gain'] = 1.0
+            processing_settings['flip_h'] = True
+            processing_settings['flip_v'] = True
+            processing_settings['rotate'] = 0
+            processing_settings['zoom'] = 1.0
+        settings_changed()
+        print("[PROCESS] Reset all settings to defaults")
+        self.send_json()
+
+    def handle_process_batch(self):
+        """Apply several slider settings from a JSON body ({"brightness": 10, "zoom": 150, ...})"""
+        try:
+            changes = apply_slider_settings(json.loads(self.request_body))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"[PROCESS] Bad batch: {e}")
+            self.send_status(400)
+            return
+        debug_log(f"Received batch {changes}, updated settings")
+        self.send_json()
+
+    def handle_process(self, setting, value_str):
+        """Update a single image processing setting"""
+        global processing_settings
+
+        try:
+            if setting in SLIDER_SETTINGS or setting in STABILIZATION_SLIDERS:
+                value = apply_slider_settings({setting: value_str})[setting]
+                debug_log(f"Received {setting}={value}, updated settings")
+
+            elif setting == 'flip_h' and value_str == 'toggle':
+                with processing_lock:
+                    processing_settings['flip_h'] = not processing_settings['flip_h']
+                    new_state = processing_settings['flip_h']
+                debug_log(f"Received flip_h toggle, new state={new_state}")
 
-    def do_POST(self):
-        global processing_settings, capture_fps, jpeg_quality
+            elif setting == 'flip_v' and value_str == 'toggle':
+                with processing_lock:
+                    processing_settings['flip_v'] = not processing_settings['flip_v']
+                    new_state = processing_settings['flip_v']
+                debug_log(f"Received flip_v toggle, new state={new_state}")
 
-        # Handle image processing settings
-        if self.path.startswith('/process/'):
-            parts = self.path.split('/')
+            elif setting == 'rotate':
+                delta = int(value_str)
+                with processing_lock:
+                    processing_settings['rotate'] = (processing_settings['rotate'] + delta) % 360
+                    new_rotation = processing_settings['rotate']
+                debug_log(f"Received rotation delta={delta}, new rotation={new_rotation}°")
 
-            if parts[2] == 'reset':
-                # Reset all processing settings to defaults
+            elif setting == 'stabilize' and value_str == 'toggle':
                 with processing_lock:
-                    processing_settings['brightness'] = 0
-                    processing_settings['contrast'] = 1.0
-                    processing_settings['saturation'] = 1.0
-                    processing_settings['gain'] = 1.0
-                    processing_settings['flip_h'] = True
-                    processing_settings['flip_v'] = True
-                    processing_settings['rotate'] = 0
-                    processing_settings['zoom'] = 1.0
-                print("[PROCESS] Reset all settings to defaults")
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(b'{"status": "ok"}')
+                    processing_settings['stabilize'] = not processing_settings['stabilize']
+                    new_state = processing_settings['stabilize']
+                if not new_state:
+                    # Reset stabilization state when turning off
+                    reset_stabilization()
+                settings_changed()
+                debug_log(f"Received stabilize toggle, new state={new_state}")
+                # Return JSON with enabled state for UI update
+                self.send_json(f'{{"status": "ok", "enabled": {"true" if new_state else "false"}}}'.encode())
                 return
 
-            elif len(parts) == 4:
-                setting = parts[2]
-                value_str = parts[3]
-
-                try:
-                    timestamp = datetime.now().isoformat()
-                    if setting == 'brightness':
-                        value = int(value_str)
-                        with processing_lock:
-                            processing_settings['brightness'] = value
-                        print(f"[{timestamp}] PYTHON: Received brightness={value}, updated settings")
-
-                    elif setting == 'contrast':
-                        value = int(value_str) / 100.0  # Convert 10-300 to 0.1-3.0
-                        with processing_lock:
-                            processing_settings['contrast'] = value
-                        print(f"[{timestamp}] PYTHON: Received contrast={value:.2f}, updated settings")
-
-                    elif setting == 'saturation':
-                        value = int(value_str) / 100.0  # Convert 0-300 to 0.0-3.0
-                        with processing_lock:
-                            processing_settings['saturation'] = value
-                        print(f"[{timestamp}] PYTHON: Received saturation={value:.2f}, updated settings")
-
-                    elif setting == 'flip_h' and value_str == 'toggle':
-                        with processing_lock:
-                            processing_settings['flip_h'] = not processing_settings['flip_h']
-                            new_state = processing_settings['flip_h']
-                        print(f"[{timestamp}] PYTHON: Received flip_h toggle, new state={new_state}")
-
-                    elif setting == 'flip_v' and value_str == 'toggle':
-                        with processing_lock:
-                            processing_settings['flip_v'] = not processing_settings['flip_v']
-                            new_state = processing_settings['flip_v']
-                        print(f"[{timestamp}] PYTHON: Received flip_v toggle, new state={new_state}")
-
-                    elif setting == 'rotate':
-                        delta = int(value_str)
-                        with processing_lock:
-                            processing_settings['rotate'] = (processing_settings['rotate'] + delta) % 360
-                            new_rotation = processing_settings['rotate']
-                        print(f"[{timestamp}] PYTHON: Received rotation delta={delta}, new rotation={new_rotation}°")
-
-                    elif setting == 'zoom':
-                        value = int(value_str) / 100.0  # Convert 50-400 to 0.5-4.0
-                        with processing_lock:
-                            processing_settings['zoom'] = value
-                        print(f"[{timestamp}] PYTHON: Received zoom={value:.2f}x, updated settings")
-
-                    elif setting == 'gain':
-                        value = int(value_str) / 100.0  # Convert 20-300 to 0.2-3.0
-                        with processing_lock:
-                            processing_settings['gain'] = value
-                        print(f"[{timestamp}] PYTHON: Received gain={value:.1f}x, updated settings")
-
-                    elif setting == 'stabilize' and value_str == 'toggle':
-                        with processing_lock:
-                            processing_settings['stabilize'] = not processing_settings['stabilize']
-                            new_state = processing_settings['stabilize']
-                        if not new_state:
-                            # Reset stabilization state when turning off
-                            reset_stabilization()
-                        print(f"[{timestamp}] PYTHON: Received stabilize toggle, new state={new_state}")
-                        # Return JSON with enabled state for UI update
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(f'{{"status": "ok", "enabled": {"true" if new_state else "false"}}}'.encode())
-                        return
-
-                    elif setting == 'stab_noise':
-                        value = int(value_str) / 10.0  # Convert 0-30 to 0.0-3.0
-                        with stabilization_lock:
-                            stabilization_state['noise_threshold'] = value
-                        print(f"[{timestamp}] PYTHON: Stabilization noise threshold={value:.1f}")
-
-                    elif setting == 'stab_smooth':
-                        value = int(value_str) / 100.0  # Convert 0-90 to 0.0-0.9
-                        with stabilization_lock:
-                            stabilization_state['correction_smoothing'] = value
-                        print(f"[{timestamp}] PYTHON: Stabilization smoothing={value:.2f}")
-
-                    elif setting == 'stab_decay':
-                        value = int(value_str) / 100.0  # Convert 30-95 to 0.3-0.95
-                        with stabilization_lock:
-                            stabilization_state['decay'] = value
-                        print(f"[{timestamp}] PYTHON: Stabilization decay={value:.2f}")
-
-                    elif setting == 'stab_blend':
-                        value = int(value_str)  # 1-5 frames
-                        with stabilization_lock:
-                            stabilization_state['blend_frames'] = value
-                            stabilization_state['frame_buffer'] = []  # Clear buffer when changing
-                        print(f"[{timestamp}] PYTHON: Stabilization frame blend={value}")
-
-                    elif setting == 'stab_reset':
-                        with stabilization_lock:
-                            stabilization_state['noise_threshold'] = 0.5
-                            stabilization_state['correction_smoothing'] = 0.3
-                            stabilization_state['decay'] = 0.6
-                            stabilization_state['blend_frames'] = 2
-                            stabilization_state['frame_buffer'] = []
-                            stabilization_state['accumulated_x'] = 0.0
-                            stabilization_state['accumulated_y'] = 0.0
-                            stabilization_state['smooth_correction_x'] = 0.0
-                            stabilization_state['smooth_correction_y'] = 0.0
-                        print(f"[{timestamp}] PYTHON: Stabilization settings reset to defaults")
-
-                    else:
-                        self.send_response(400)
-                        self.end_headers()
-                        return
-
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(b'{"status": "ok"}')
-                    return
-                except Exception as e:
-                    print(f"[PROCESS] Error: {e}")
-                    self.send_response(400)
-                    self.end_headers()
-                    return
-
-        # Handle capture settings API
-        elif self.path.startswith('/capture/'):
-            parts = self.path.split('/')
-            if len(parts) == 4:
-                setting = parts[2]
-                try:
-                    value = int(parts[3])
-
-                    if setting == 'fps' and 1 <= value <= 30:
-                        global capture_fps
-                        capture_fps = value
-                        print(f"[CAPTURE] Capture FPS set to: {value}")
-
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(b'{"status": "ok"}')
-                        return
-
-                    elif setting == 'quality' and 10 <= value <= 100:
-                        global jpeg_quality
-                        jpeg_quality = value
-                        print(f"[CAPTURE] JPEG quality set to: {value}")
-
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(b'{"status": "ok"}')
-                        return
-
-                    elif setting == 'exposure' and -13 <= value <= 0:
-                        global exposure_value
-                        exposure_value = value
-                        # Apply to camera if available
-                        if usb_camera_cap is not None:
-                            usb_camera_cap.set(cv2.CAP_PROP_EXPOSURE, value)
-                        print(f"[CAPTURE] Exposure set to: {value}")
-
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(b'{"status": "ok"}')
-                        return
-
-                except:
-                    pass
-
-            # Handle auto_exposure toggle (non-integer value)
-            if len(parts) == 4 and parts[2] == 'auto_exposure' and parts[3] == 'toggle':
-                global auto_exposure
-                auto_exposure = not auto_exposure
-                # Apply to camera if available
-                if usb_camera_cap is not None:
-                    if auto_exposure:
-                        # Enable auto exposure (value depends on camera, typically 3=auto, 1=manual)
-                        usb_camera_cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 3)
-                    else:
-                        # Disable auto exposure and set manual value
-                        usb_camera_cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)
-                        usb_camera_cap.set(cv2.CAP_PROP_EXPOSURE, exposure_value)
-                print(f"[CAPTURE] Auto exposure: {auto_exposure}")
-
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(f'{{"status": "ok", "enabled": {"true" if auto_exposure else "false"}}}'.encode())
+            elif setting == 'stab_reset':
+                with stabilization_lock:
+                    stabilization_state['noise_threshold'] = 0.5
+                    stabilization_state['correction_smoothing'] = 0.3
+                    stabilization_state['decay'] = 0.6
+                    stabilization_state['blend_frames'] = 2
+                    stabilization_state['blend_accum'] = None
+                    stabilization_state['accumulated_x'] = 0.0
+                    stabilization_state['accumulated_y'] = 0.0
+                    stabilization_state['smooth_correction_x'] = 0.0
+                    stabilization_state['smooth_correction_y'] = 0.0
+                debug_log("Stabilization settings reset to defaults")
+
+            else:
+                self.send_status(400)
                 return
 
-            self.send_response(400)
-            self.end_headers()
-
-        else:
-            self.send_response(404)
-            self.end_headers()
+            settings_changed()
+            self.send_json()
+            return
+        except Exception as e:
+            print(f"[PROCESS] Error: {e}")
+            self.send_status(400)
+            return
+
+    def handle_capture(self, setting, value_str):
+        """Update capture settings (fps, JPEG quality, exposure, auto exposure)"""
+        global auto_exposure
+
+        # Handle auto_exposure toggle (non-integer value)
+        if setting == 'auto_exposure' and value_str == 'toggle':
+            auto_exposure = not auto_exposure
+            # Apply to camera if available
+            if usb_camera_cap is not None:
+                if auto_exposure:
+                    # Enable auto exposure (value depends on camera, typically 3=auto, 1=manual)
+                    usb_camera_cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 3)
+                else:
+                    # Disable auto exposure and set manual value
+                    usb_camera_cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)
+                    usb_camera_cap.set(cv2.CAP_PROP_EXPOSURE, exposure_value)
+            print(f"[CAPTURE] Auto exposure: {auto_exposure}")
+
+            self.send_json(f'{{"status": "ok", "enabled": {"true" if auto_exposure else "false"}}}'.encode())
+            return
+
+        entry = CAPTURE_SETTINGS.get(setting)
+        try:
+            value = int(value_str)
+        except ValueError:
+            value = None
+        if entry is None or value is None or not entry[0] <= value <= entry[1]:
+            self.send_status(400)
+            return
+
+        setter, label = entry[2:]
+        setter(value)
+        print(f"[CAPTURE] {label} set to: {value}")
+        self.send_json()
 
     def log_message(self, fmt, *arguments):
         pass
 
+class MicroscopeServer(ThreadingHTTPServer):
+    """Threaded HTTP server that leaves MJPEG sockets open for the stream broadcaster"""
+    def shutdown_request(self, request):
+        if request in stream_state['clients']:
+            return  # Owned (and eventually closed) by broadcast_streams()
+        super().shutdown_request(request)
+
 def create_black_frame():
     if USB_AVAILABLE:
         black = np.zeros((720, 1280, 3), dtype=np.uint8)
@@ -1583,30 +2100,445 @@ def create_black_frame():
             return jpeg.tobytes()
     return None
 
+def publish_frame(jpeg_bytes, sequence=None):
+    """Make a JPEG frame (bytes-like) current for all web clients; stale out-of-order frames are dropped"""
+    global current_frame, published_sequence
+    if sequence is None:
+        sequence = next(frame_sequence)
+    with frame_lock:
+        if sequence <= published_sequence:
+            return
+        published_sequence = sequence
+        current_frame = (jpeg_bytes, current_frame[1] + 1, mjpeg_part_header(jpeg_bytes))
+        frame_published.notify_all()
+    frame_event.set()
+    wake_stream_broadcaster()
+
+def mjpeg_part_header(jpeg_bytes):
+    """Multipart boundary + headers for one MJPEG frame (built once, shared by all clients)"""
+    return (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+            % len(jpeg_bytes))
+
+def send_parts(sock, parts):
+    """Send all parts with one sendmsg (writev) call where possible, handling short writes"""
+    if not hasattr(sock, 'sendmsg'):  # Windows
+        sock.sendall(b''.join(parts))
+        return
+    views = [memoryview(part) for part in parts]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= len(views[0]):
+            sent -= len(views.pop(0))
+        if views and sent:
+            views[0] = views[0][sent:]
+
+def latest_frame():
+    """Return (jpeg_bytes, frame_number, mjpeg_part_header) of the newest frame without locking"""
+    return current_frame
+
+# MJPEG viewers are all served by one broadcaster thread: non-blocking client
+# sockets, a selector for the ones with unsent data, and a wakeup socket pair
+# poked by publish_frame() and add_stream_client()
+stream_state = {
+    'clients': {},       # socket -> per-viewer dict (delay, deadline, last_frame, pending, sent)
+    'selector': None,
+    'wakeup': None,      # (read_sock, write_sock)
+    'thread': None
+}
+stream_lock = threading.Lock()  # Guards stream_state['clients'] and broadcaster start-up
+viewers_condition = threading.Condition()  # Notified when viewers connect or go away
+SNAPSHOT_KEEPALIVE = 2.0  # Seconds capture keeps running after a /current.jpg request
+snapshot_deadline = 0.0   # time.monotonic() until which /current.jpg counts as a consumer
+
+def frames_wanted():
+    """True while anything consumes frames (MJPEG viewers, the shared frame ring or a recent snapshot)"""
+    return (bool(stream_state['clients']) or SHARED_RING_FRAMES > 0
+            or time.monotonic() < snapshot_deadline)
+
+def fresh_frame(timeout):
+    """latest_frame() for a one-off request: wake idle capture and wait (up to timeout) for a new frame"""
+    global snapshot_deadline
+    was_wanted = frames_wanted()
+    frame_number = latest_frame()[1]
+    snapshot_deadline = time.monotonic() + SNAPSHOT_KEEPALIVE
+    if was_wanted:
+        return latest_frame()  # Capture is running, the current frame is fresh
+
+    with viewers_condition:
+        viewers_condition.notify_all()
+    with frame_published:
+        frame_published.wait_for(lambda: current_frame[1] != frame_number, timeout)
+    return latest_frame()
+
+def wait_for_viewers(timeout):
+    """Block until frames are wanted (or timeout); returns frames_wanted()"""
+    with viewers_condition:
+        return viewers_condition.wait_for(frames_wanted, timeout)
+
+def wake_stream_broadcaster():
+    """Interrupt the broadcaster's select() (new frame or new viewer)"""
+    wakeup = stream_state['wakeup']
+    if wakeup is not None:
+        try:
+            wakeup[1].send(b'\0')
+        except OSError:
+            pass  # Buffer full - a wakeup is already pending
+
+def add_stream_client(sock, fps):
+    """Register an MJPEG viewer socket (headers already sent) with the broadcaster"""
+    sock.setblocking(False)
+    with stream_lock:
+        if stream_state['thread'] is None:
+            stream_state['selector'] = selectors.DefaultSelector()
+            wake_r, wake_w = socket.socketpair()
+            wake_r.setblocking(False)
+            wake_w.setblocking(False)
+            stream_state['selector'].register(wake_r, selectors.EVENT_READ)
+            stream_state['wakeup'] = (wake_r, wake_w)
+            stream_state['thread'] = threading.Thread(target=broadcast_streams, daemon=True)
+            stream_state['thread'].start()
+        stream_state['clients'][sock] = {
+            'delay': 1.0 / fps,
+            'deadline': time.monotonic(),
+            'last_frame': 0,   # Frame numbers start at 1 once something is published
+            'pending': None,   # Unsent memoryviews of the frame in flight
+            'sent': 0
+        }
+    wake_stream_broadcaster()
+    with viewers_condition:
+        viewers_condition.notify_all()
+
+def drop_stream_client(sock):
+    """Forget a viewer whose connection failed"""
+    with stream_lock:
+        stream_state['clients'].pop(sock, None)
+    with viewers_condition:
+        viewers_condition.notify_all()
+    try:
+        stream_state['selector'].unregister(sock)
+    except (KeyError, ValueError):
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+def flush_stream_client(sock, client):
+    """Send as much of the client's pending frame as the socket takes; False if it failed"""
+    views = client['pending']
+    try:
+        if hasattr(sock, 'sendmsg'):
+            while views:
+                sent = sock.sendmsg(views)
+                while views and sent >= len(views[0]):
+                    sent -= len(views.pop(0))
+                if views and sent:
+                    views[0] = views[0][sent:]
+        else:  # Windows
+            data = views[0] if len(views) == 1 else memoryview(b''.join(views))
+            views[:] = [data]
+            while views:
+                sent = sock.send(views[0])
+                views[0] = views[0][sent:]
+                if not len(views[0]):
+                    views.pop(0)
+    except (BlockingIOError, InterruptedError):
+        pass
+    except OSError:
+        return False
+
+    # Only sockets with unsent data are watched for writability
+    selector = stream_state['selector']
+    if views:
+        if sock not in selector.get_map():
+            selector.register(sock, selectors.EVENT_WRITE, client)
+    else:
+        client['pending'] = None
+        if sock in selector.get_map():
+            selector.unregister(sock)
+    return True
+
+def broadcast_streams():
+    """Broadcaster thread: send the newest frame to every viewer at its own FPS"""
+    selector = stream_state['selector']
+    wake_r = stream_state['wakeup'][0]
+    timeout = None
+    while running:
+        for key, _ in selector.select(timeout):
+            if key.fileobj is wake_r:
+                try:
+                    while wake_r.recv(4096):
+                        pass
+                except (BlockingIOError, InterruptedError):
+                    pass
+            elif not flush_stream_client(key.fileobj, key.data):
+                drop_stream_client(key.fileobj)
+
+        frame, frame_number, part_header = latest_frame()
+        now = time.monotonic()
+        timeout = 1.0  # Re-check running at least once a second
+        with stream_lock:
+            clients = list(stream_state['clients'].items())
+        for sock, client in clients:
+            if client['pending'] or not frame or frame_number == client['last_frame']:
+                continue
+            if now < client['deadline']:
+                timeout = min(timeout, client['deadline'] - now)
+                continue
+
+            # Shared pre-built header, JPEG and trailer in one gather-write
+            client['pending'] = [memoryview(part_header), memoryview(frame), memoryview(b'\r\n')]
+            client['last_frame'] = frame_number
+            # Fixed cadence; a late frame doesn't push back the following slots
+            client['deadline'] = max(client['deadline'] + client['delay'], now)
+            if not flush_stream_client(sock, client):
+                drop_stream_client(sock)
+                continue
+
+            client['sent'] += 1
+            # Debug: Print every 30 frames sent
+            if DEBUG and client['sent'] % 30 == 0:
+                timestamp = time.strftime('%H:%M:%S')
+                print(f"[{timestamp}] PYTHON STREAM: Sent frame {client['sent']} to browser, frame_num={frame_number}")
+
+def decode_frame(jpeg_bytes):
+    """Decode a camera JPEG to BGR (into a pooled buffer with TurboJPEG); None if corrupt"""
+    if TURBOJPEG_AVAILABLE:
+        try:
+            width, height, _, _ = turbo_jpeg.decode_header(jpeg_bytes)
+            return turbo_jpeg.decode(jpeg_bytes, pixel_format=TJPF_BGR,
+                                     dst=get_frame_buffer((height, width, 3)))
+        except Exception:
+            return None
+    nparr = np.frombuffer(jpeg_bytes, np.uint8)
+    with SuppressStderr():
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+def encode_frame(frame, quality):
+    """Encode a processed BGR frame to JPEG bytes (runs on the encode pool)"""
+    if TURBOJPEG_AVAILABLE:
+        # 4:2:0 chroma (as cv2.imencode) and the fast integer DCT - noticeably less
+        # CPU per frame than the 4:2:2 / accurate-DCT defaults, invisible at stream quality
+        return turbo_jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR,
+                                 jpeg_subsample=TJSAMP_420, flags=TJFLAG_FASTDCT)
+    # Optimized Huffman tables cost extra CPU and don't help a live stream
+    ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                             cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+    # Publish a flat byte view of imencode's buffer - wfile.write() takes any
+    # bytes-like object, so the JPEG is never copied into a bytes object
+    return memoryview(jpeg).cast('B') if ret else None
+
+def close_shared_ring():
+    """Release (and unlink) the shared frame ring"""
+    if shared_ring['shm'] is not None:
+        shared_ring['header'] = shared_ring['frames'] = None
+        shared_ring['shm'].close()
+        shared_ring['shm'].unlink()
+        shared_ring['shm'] = None
+
+def publish_shared_frame(frame):
+    """Copy a processed frame into the next slot of the named shared frame ring"""
+    frames = shared_ring['frames']
+    if frames is None or frames.shape[1:] != frame.shape:
+        # Size changed (rotation, camera) - readers must re-attach to the new ring
+        close_shared_ring()
+        ring_shape = (SHARED_RING_FRAMES,) + frame.shape
+        try:
+            shm = shared_memory.SharedMemory(name=SHARED_RING_NAME, create=True,
+                                             size=SHARED_RING_HEADER + int(np.prod(ring_shape)))
+        except FileExistsError:
+            # Left behind by a previous run that didn't shut down cleanly
+            stale = shared_memory.SharedMemory(name=SHARED_RING_NAME)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=SHARED_RING_NAME, create=True,
+                                             size=SHARED_RING_HEADER + int(np.prod(ring_shape)))
+        header = np.ndarray((4,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = (0, frame.shape[0], frame.shape[1],
+                     frame.shape[2] if frame.ndim == 3 else 1)
+        frames = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf, offset=SHARED_RING_HEADER)
+        shared_ring.update(shm=shm, header=header, frames=frames)
+
+    header = shared_ring['header']
+    sequence = int(header[0])
+    np.copyto(frames[sequence % SHARED_RING_FRAMES], frame)
+    header[0] = sequence + 1  # Publish only after the slot is fully written
+
+def submit_encode(frame, quality):
+    """Queue a processed frame for encoding; the result is published when done"""
+    if SHARED_RING_FRAMES > 0:
+        publish_shared_frame(frame)
+    if ENCODER_PROCESSES > 0:
+        submit_encode_to_processes(frame, quality)
+        return
+    # Forget finished encodes, and cancel the oldest queued ones on overflow.
+    # Encodes that are already running stay tracked so their frame isn't reused.
+    pending = [(f, buf) for f, buf in pending_encodes if not f.done()]
+    overflow = len(pending) - MAX_PENDING_ENCODES + 1
+    pending_encodes.clear()
+    for f, buf in pending:
+        if overflow > 0 and f.cancel():
+            overflow -= 1
+            continue
+        pending_encodes.append((f, buf))
+
+    sequence = next(frame_sequence)
+    future = encode_executor.submit(encode_frame, frame, quality)
+
+    def on_encoded(f):
+        if f.cancelled() or f.exception() is not None:
+            return
+        jpeg_bytes = f.result()
+        if jpeg_bytes is not None:
+            publish_frame(jpeg_bytes, sequence)
+
+    future.add_done_callback(on_encoded)
+    pending_encodes.append((future, frame))
+
+def encode_worker(shm_name, ring_shape, generation, tasks, results):
+    """Encoder process: JPEG-encode frames from the shared ring until sent None"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, sequence, quality = task
+            jpeg = encode_frame(ring[slot], quality)
+            # Result crosses a process boundary - must be a picklable bytes object
+            results.put((generation, slot, sequence, bytes(jpeg) if jpeg is not None else None))
+    finally:
+        del ring
+        shm.close()
+
+def collect_encoded_frames(results):
+    """Publish frames coming back from the encoder processes"""
+    while True:
+        generation, slot, sequence, jpeg_bytes = results.get()
+        with encoder_lock:
+            if generation == encoder_state['generation']:
+                encoder_state['busy_slots'].discard(slot)
+        if jpeg_bytes is not None:
+            publish_frame(jpeg_bytes, sequence)
+
+def stop_encoder_processes():
+    """Stop the encoder processes and release the shared frame ring"""
+    for _ in encoder_state['workers']:
+        encoder_state['tasks'].put(None)
+    for worker in encoder_state['workers']:
+        worker.join(timeout=2)
+    encoder_state['workers'] = []
+    if encoder_state['shm'] is not None:
+        encoder_state['ring'] = None
+        encoder_state['shm'].close()
+        encoder_state['shm'].unlink()
+        encoder_state['shm'] = None
+
+def start_encoder_processes(shape):
+    """(Re)allocate the shared frame ring for this frame shape and start the workers"""
+    stop_encoder_processes()
+    # A fresh task queue per ring, so tasks queued for the old ring (or a stop
+    # sentinel an old worker never took) can't reach the new workers
+    encoder_state['tasks'] = multiprocessing.Queue()
+    if encoder_state['results'] is None:
+        encoder_state['results'] = multiprocessing.Queue()
+        threading.Thread(target=collect_encoded_frames, args=(encoder_state['results'],),
+                         daemon=True).start()
+    ring_shape = (ENCODER_RING_SLOTS,) + shape
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(ring_shape)))
+    encoder_state['shm'] = shm
+    encoder_state['ring'] = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    encoder_state['generation'] += 1
+    encoder_state['busy_slots'] = set()
+    encoder_state['next_slot'] = 0
+    for _ in range(ENCODER_PROCESSES):
+        worker = multiprocessing.Process(target=encode_worker, daemon=True,
+                                         args=(shm.name, ring_shape, encoder_state['generation'],
+                                               encoder_state['tasks'], encoder_state['results']))
+        worker.start()
+        encoder_state['workers'].append(worker)
+
+def submit_encode_to_processes(frame, quality):
+    """Copy a processed frame into the shared ring and hand it to an encoder process"""
+    ring = encoder_state['ring']
+    if ring is None or ring.shape[1:] != frame.shape:
+        with encoder_lock:
+            start_encoder_processes(frame.shape)
+        ring = encoder_state['ring']
+    with encoder_lock:
+        slot = encoder_state['next_slot']
+        if slot in encoder_state['busy_slots']:
+            return  # Workers are behind - drop this frame rather than queue up latency
+        encoder_state['busy_slots'].add(slot)
+        encoder_state['next_slot'] = (slot + 1) % ENCODER_RING_SLOTS
+        tasks = encoder_state['tasks']
+    np.copyto(ring[slot], frame)
+    tasks.put((slot, next(frame_sequence), quality))
+
+def hand_off_frame(frame, quality):
+    """Pass the newest captured frame to the processing thread (replacing an unprocessed one)"""
+    with raw_condition:
+        raw_mailbox['frame'] = frame
+        raw_mailbox['quality'] = quality
+        raw_condition.notify()
+        if raw_mailbox['thread'] is None:
+            raw_mailbox['thread'] = threading.Thread(target=process_frames, daemon=True)
+            raw_mailbox['thread'].start()
+
+def process_frames():
+    """Processing thread: decode (WiFi), process and queue the newest captured frame for encoding"""
+    failures = 0
+    while running:
+        with raw_condition:
+            if not raw_condition.wait_for(lambda: raw_mailbox['frame'] is not None, timeout=1.0):
+                continue
+            frame, quality = raw_mailbox['frame'], raw_mailbox['quality']
+            raw_mailbox['frame'] = None
+
+        # This is the only processing thread - a bad frame must not end it
+        try:
+            if not isinstance(frame, np.ndarray):
+                frame = decode_frame(frame)
+                if frame is None:
+                    continue  # Corrupt JPEG
+            submit_encode(apply_image_processing(frame), quality)
+            failures = 0
+        except Exception as e:
+            failures += 1
+            if failures == 1 or failures % 100 == 0:  # Don't flood the log at frame rate
+                print(f"[PROCESS] Frame processing failed ({failures}x): {e!r}")
+
+def probe_device(device_id):
+    """Return device_id if it opens with the microscope's native 1280x720, else None"""
+    try:
+        cap = cv2.VideoCapture(device_id)
+        if cap.isOpened():
+            native_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            native_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+            if native_w == 1280 and native_h == 720:
+                return device_id
+    except Exception:
+        pass
+    return None
+
 def find_microscope_device():
     """Find microscope device - native 1280x720 resolution"""
     if not USB_AVAILABLE:
         return None
-    try:
-        # Just scan for 1280x720 device without system_profiler check
-        for device_id in range(10):
-            try:
-                cap = cv2.VideoCapture(device_id)
-                if cap.isOpened():
-                    native_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    native_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    cap.release()
-                    if native_w == 1280 and native_h == 720:
-                        return device_id
-            except:
-                pass
-    except:
-        pass
+    # Just scan for 1280x720 device without system_profiler check. Opening a
+    # camera can take a few hundred ms, so all ids are probed at once; the
+    # lowest matching id wins, as with a serial scan.
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        for device_id in pool.map(probe_device, range(10)):
+            if device_id is not None:
+                return device_id
     return None
 
 def capture_usb():
     """Capture frames from USB microscope and apply processing"""
-    global current_frame, running, connection_mode, usb_camera_cap, microscope_connected, current_frame_number
+    global running, connection_mode, usb_camera_cap, microscope_connected
 
     if not USB_AVAILABLE:
         print("ERROR: OpenCV not available for USB capture")
@@ -1619,10 +2551,7 @@ def capture_usb():
         microscope_connected = False
         black_frame = create_black_frame()
         if black_frame:
-            with frame_lock:
-                current_frame = black_frame
-                current_frame_number += 1
-            frame_event.set()
+            publish_frame(black_frame)
         return
     
     print(f"Found microscope on device {device_id}")
@@ -1632,10 +2561,7 @@ def capture_usb():
         microscope_connected = False
         black_frame = create_black_frame()
         if black_frame:
-            with frame_lock:
-                current_frame = black_frame
-                current_frame_number += 1
-            frame_event.set()
+            publish_frame(black_frame)
         return
     
     connection_mode = 'usb'
@@ -1648,6 +2574,16 @@ def capture_usb():
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
     cap.set(cv2.CAP_PROP_FPS, 30)
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    # Ask for the camera's native MJPEG stream - with conversion turned off
+    # (V4L2 backend), cap.read() then returns the JPEG itself
+    mjpg = cv2.VideoWriter_fourcc(*'MJPG')
+    cap.set(cv2.CAP_PROP_FOURCC, mjpg)
+    # Only a camera that really delivers MJPEG can skip conversion - a
+    # YUYV-only one would hand back raw YUYV
+    camera_mjpeg = int(cap.get(cv2.CAP_PROP_FOURCC)) == mjpg
+    if not camera_mjpeg:
+        print("Camera did not accept MJPG, JPEG pass-through disabled")
+    raw_jpeg = False
 
     # Print camera exposure capabilities for debugging
     print(f"\n=== Camera Exposure Info ===")
@@ -1660,31 +2596,45 @@ def capture_usb():
     print(f"Capturing from USB microscope...")
     print(f"All image processing done in Python - sliders affect image in real-time\n")
 
-    last_capture_time = time.time()
+    next_capture_time = time.monotonic()
     frame_counter = 0
-    last_debug_time = time.time()
+    last_debug_time = time.monotonic()
 
     consecutive_failures = 0
     max_failures = 30  # Wait longer before giving up (3 seconds at 10 fps)
     
     while running:
+        # Nobody watching - stop reading the camera until a viewer connects
+        if not frames_wanted():
+            wait_for_viewers(timeout=1.0)
+            continue
+
         # Read capture settings
         global capture_fps, jpeg_quality
         current_fps = capture_fps
         current_quality = jpeg_quality
 
-        # Check if enough time has elapsed for next frame
-        if current_fps > 0:
-            frame_delay = 1.0 / current_fps
-            elapsed = time.time() - last_capture_time
-            if elapsed < frame_delay:
-                # Sleep in small increments to remain responsive
-                time.sleep(min(0.01, frame_delay - elapsed))
-                continue  # Check again next iteration
-
-        last_capture_time = time.time()
-
-        ret, frame = cap.read()
+        # grab() every camera frame (blocks at the camera's rate, so the
+        # driver never hands us a stale buffered frame) but only retrieve() -
+        # the decode/convert step - the ones due at capture_fps
+        ret = cap.grab()
+        if ret:
+            now = time.monotonic()
+            if current_fps > 0:
+                if now < next_capture_time:
+                    continue
+                # Fixed cadence; a late frame doesn't push back the following ones
+                next_capture_time = max(next_capture_time + 1.0 / current_fps, now)
+
+            # With identity processing, skip decode + re-encode and forward the
+            # camera's JPEG. Backends that ignore CONVERT_RGB keep returning BGR.
+            # The shared ring needs decoded frames, so never with it enabled.
+            want_raw = camera_mjpeg and current_settings()[1] and SHARED_RING_FRAMES == 0
+            if want_raw != raw_jpeg:
+                cap.set(cv2.CAP_PROP_CONVERT_RGB, 0 if want_raw else 1)
+                raw_jpeg = want_raw
+
+            ret, frame = cap.retrieve()
         if ret:
             consecutive_failures = 0
             if not microscope_connected:
@@ -1694,34 +2644,25 @@ def capture_usb():
             frame_counter += 1
 
             # Debug every 30 frames
-            if frame_counter % 30 == 0:
-                actual_fps = 30.0 / (time.time() - last_debug_time)
-                last_debug_time = time.time()
-                timestamp = datetime.now().isoformat()
+            if DEBUG and frame_counter % 30 == 0:
+                actual_fps = 30.0 / (time.monotonic() - last_debug_time)
+                last_debug_time = time.monotonic()
+                timestamp = time.strftime('%H:%M:%S')
                 with processing_lock:
                     settings_str = f"B:{processing_settings['brightness']} C:{processing_settings['contrast']:.1f} S:{processing_settings['saturation']:.1f} Z:{processing_settings['zoom']:.1f}x"
                 print(f"[{timestamp}] PYTHON CAPTURE: Processing frame {frame_counter} with settings: {settings_str}, {actual_fps:.1f} fps")
 
-            # Apply all image processing in Python
-            processed_frame = apply_image_processing(frame)
-
-            # Encode to JPEG
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, current_quality]
-
-            with SuppressStderr():
-                ret, jpeg = cv2.imencode('.jpg', processed_frame, encode_params)
-
-            if ret:
-                new_frame = jpeg.tobytes()
-                with frame_lock:
-                    current_frame = new_frame
-                    current_frame_number += 1
-                    frame_num = current_frame_number
-                frame_event.set()
-                # Debug: Print when we update the frame
-                if frame_counter % 30 == 0:
-                    timestamp = datetime.now().isoformat()
-                    print(f"[{timestamp}] PYTHON CAPTURE: Encoded and stored frame_num={frame_num}")
+            if frame.ndim == 3:
+                # Process + encode on the processing thread
+                hand_off_frame(frame, current_quality)
+            else:
+                # Undecoded MJPEG buffer (1 x N bytes); anything that isn't a
+                # JPEG (no SOI marker) goes through the decoder instead
+                jpeg = memoryview(frame).cast('B')
+                if raw_jpeg and jpeg[:2] == b'\xff\xd8':
+                    publish_frame(jpeg)
+                else:
+                    hand_off_frame(jpeg, current_quality)  # Decoded on the processing thread
         else:
             consecutive_failures += 1
             if consecutive_failures == 1 and microscope_connected:
@@ -1730,10 +2671,7 @@ def capture_usb():
                 # Send black frame
                 black_frame = create_black_frame()
                 if black_frame:
-                    with frame_lock:
-                        current_frame = black_frame
-                        current_frame_number += 1
-                    frame_event.set()
+                    publish_frame(black_frame)
             
             # Exit after too many failures to allow reconnection
             if consecutive_failures >= max_failures:
@@ -1749,7 +2687,7 @@ def capture_usb():
 
 def capture_wifi():
     """Capture frames from WiFi microscope and apply processing"""
-    global current_frame, running, connection_mode, microscope_connected
+    global running, connection_mode, microscope_connected
 
     print(f"Attempting to connect to WiFi microscope at {HOST}...")
 
@@ -1766,8 +2704,17 @@ def capture_wifi():
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as r:
                 r.bind(("", RPORT))
                 r.setblocking(0)
-
-                frame_buffer = bytearray()
+                packet = bytearray(1450)  # Reused receive buffer (recv_into, no per-packet bytes)
+                packet_view = memoryview(packet)
+
+                # Each frame is assembled in its own buffer, allocated when the frame
+                # starts at the largest frame size seen so far (plus headroom), so
+                # appending packets doesn't realloc. A finished frame is published as
+                # a view of its buffer, which viewers may still be sending while the
+                # next frame arrives, so buffers are not recycled.
+                frame_capacity = 64 * 1024
+                frame_buffer = bytearray(frame_capacity)
+                frame_size = 0
                 last_framecount = -1
                 heartbeat_counter = 0
 
@@ -1777,74 +2724,83 @@ def capture_wifi():
                 print("All image processing done in Python - sliders affect image in real-time\n")
 
                 frame_counter = 0
-                last_debug_time = time.time()
+                last_debug_time = time.monotonic()
                 last_frame_time = time.time()
                 no_data_timeout = 3.0
+                camera_streaming = True
 
                 while running:
+                    # Nobody watching - stop the camera's stream until a viewer connects
+                    if not frames_wanted():
+                        if camera_streaming:
+                            s.sendto(b"JHCMD\xd0\x02", (HOST, SPORT))
+                            camera_streaming = False
+                            frame_size = 0
+                        wait_for_viewers(timeout=1.0)
+                        continue
+                    if not camera_streaming:
+                        s.sendto(b"JHCMD\xd0\x01", (HOST, SPORT))
+                        camera_streaming = True
+                        last_frame_time = time.time()  # Restarting isn't a disconnect
+
                     try:
-                        data = r.recv(1450)
-                        if len(data) > 8:
+                        size = r.recv_into(packet)
+                        data = packet_view[:size]
+                        if size > 8:
                             last_frame_time = time.time()
                             if not microscope_connected:
                                 print("✓ WiFi microscope reconnected")
                                 microscope_connected = True
                             
-                            framecount = data[0] + data[1]*256
-                            packetcount = data[3]
+                            framecount, packetcount = PACKET_HEADER.unpack_from(packet)
 
                             if packetcount == 0:
                                 # New frame - process and save previous
-                                if frame_buffer and last_framecount != framecount:
-                                    if len(frame_buffer) >= 4 and frame_buffer[0:2] == b'\xff\xd8':
-                                        if frame_buffer[-2:] == b'\xff\xd9':
-                                            # Decode JPEG to apply processing
-                                            global current_frame_number
-                                            if USB_AVAILABLE:
-                                                nparr = np.frombuffer(frame_buffer, np.uint8)
-                                                with SuppressStderr():
-                                                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                                                if frame is not None:
-                                                    frame_counter += 1
-
-                                                    # Debug every 30 frames
-                                                    if frame_counter % 30 == 0:
-                                                        actual_fps = 30.0 / (time.time() - last_debug_time)
-                                                        last_debug_time = time.time()
-                                                        with processing_lock:
-                                                            settings_str = f"B:{processing_settings['brightness']} C:{processing_settings['contrast']:.1f} S:{processing_settings['saturation']:.1f} Z:{processing_settings['zoom']:.1f}x"
-                                                        print(f"[DEBUG] {actual_fps:.1f} fps | {settings_str}")
-
-                                                    # Apply processing
-                                                    processed_frame = apply_image_processing(frame)
-
-                                                    # Re-encode
-                                                    encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
-                                                    with SuppressStderr():
-                                                        ret, jpeg = cv2.imencode('.jpg', processed_frame, encode_params)
-
-                                                    if ret:
-                                                        with frame_lock:
-                                                            current_frame = jpeg.tobytes()
-                                                            current_frame_number += 1
-                                                        frame_event.set()
+                                jpeg = memoryview(frame_buffer)[:frame_size]
+                                if frame_size and last_framecount != framecount:
+                                    # SOI / EOI markers, checked by index (no slice objects)
+                                    if (frame_size >= 4 and frame_buffer[0] == 0xFF
+                                            and frame_buffer[1] == 0xD8):
+                                        if (frame_buffer[frame_size - 2] == 0xFF
+                                                and frame_buffer[frame_size - 1] == 0xD9):
+                                            frame_counter += 1
+
+                                            # Debug every 30 frames
+                                            if DEBUG and frame_counter % 30 == 0:
+                                                actual_fps = 30.0 / (time.monotonic() - last_debug_time)
+                                                last_debug_time = time.monotonic()
+                                                with processing_lock:
+                                                    settings_str = f"B:{processing_settings['brightness']} C:{processing_settings['contrast']:.1f} S:{processing_settings['saturation']:.1f} Z:{processing_settings['zoom']:.1f}x"
+                                                print(f"[DEBUG] {actual_fps:.1f} fps | {settings_str}")
+
+                                            if not USB_AVAILABLE or (current_settings()[1]
+                                                                       and SHARED_RING_FRAMES == 0):
+                                                # Nothing to change (or no OpenCV) - pass the camera's
+                                                # JPEG straight through without decode/re-encode. The
+                                                # shared ring needs decoded frames, so not with it on.
+                                                # A new frame_buffer is allocated below, so this
+                                                # one is never written again.
+                                                publish_frame(jpeg)
                                             else:
-                                                # No OpenCV - just pass through raw frames
-                                                with frame_lock:
-                                                    current_frame = bytes(frame_buffer)
-                                                    current_frame_number += 1
-                                                frame_event.set()
+                                                # Decode + process + re-encode on the processing
+                                                # thread, so this one keeps draining the socket
+                                                hand_off_frame(jpeg, jpeg_quality)
 
-                                frame_buffer = bytearray()
+                                frame_capacity = max(frame_capacity, frame_size + frame_size // 4)
+                                frame_buffer = bytearray(frame_capacity)
                                 last_framecount = framecount
-                                frame_buffer.extend(data[24:])
+                                payload = data[24:]
+                                frame_buffer[:len(payload)] = payload
+                                frame_size = len(payload)
 
                                 heartbeat_counter += 1
                                 if heartbeat_counter % 50 == 0:
                                     s.sendto(b"JHCMD\xd0\x01", (HOST, SPORT))
                             else:
-                                frame_buffer.extend(data[8:])
+                                # Slice assignment past the end appends if a frame outgrows the buffer
+                                payload = data[8:]
+                                frame_buffer[frame_size:frame_size + len(payload)] = payload
+                                frame_size += len(payload)
                     except:
                         # Check for timeout (no data received)
                         if time.time() - last_frame_time > no_data_timeout:
@@ -1854,12 +2810,10 @@ def capture_wifi():
                                 # Send black frame
                                 black_frame = create_black_frame()
                                 if black_frame:
-                                    with frame_lock:
-                                        current_frame = black_frame
-                                        current_frame_number += 1
-                                    frame_event.set()
+                                    publish_frame(black_frame)
                             last_frame_time = time.time()  # Reset to avoid spam
-                        time.sleep(0.001)
+                        # Socket drained - block until the next datagram instead of polling
+                        select.select([r], [], [], 0.1)
 
             s.sendto(b"JHCMD\xd0\x02", (HOST, SPORT))
             print("WiFi capture stopped")
@@ -1889,7 +2843,7 @@ def check_wifi_available():
 
 def capture_microscope():
     """Capture frames from microscope with automatic reconnection"""
-    global connection_mode, current_frame, microscope_connected, current_frame_number
+    global connection_mode, microscope_connected
 
     print("\n" + "="*50)
     print("Microscope Auto-Reconnect Service Started")
@@ -1900,10 +2854,7 @@ def capture_microscope():
         if not microscope_connected:
             black_frame = create_black_frame()
             if black_frame:
-                with frame_lock:
-                    current_frame = black_frame
-                    current_frame_number += 1
-                frame_event.set()
+                publish_frame(black_frame)
         
         print("\nDetecting microscope connection...")
         
@@ -1941,6 +2892,10 @@ def main():
     print("Microscope Web Viewer (Python Image Processing)")
     print("="*50)
     print("All image processing happens in Python")
+    if USB_AVAILABLE:
+        print(f"OpenCV threads: {cv2.getNumThreads()}, JPEG encoder: "
+              f"{'libjpeg-turbo (PyTurboJPEG)' if TURBOJPEG_AVAILABLE else 'OpenCV'}"
+              + (f" x {ENCODER_PROCESSES} processes" if ENCODER_PROCESSES > 0 else ""))
     print("Sliders affect the image in real-time")
     print("="*50)
 
@@ -1958,7 +2913,7 @@ def main():
         print("\n⚠ No microscope detected - waiting for connection...")
 
     # Start web server with threading for better concurrent connection handling
-    server = ThreadingHTTPServer(('', WEB_PORT), MicroscopeHandler)
+    server = MicroscopeServer(('', WEB_PORT), MicroscopeHandler)
     print(f"\nWeb viewer running at: http://localhost:{WEB_PORT}")
     print("Press Ctrl+C to stop\n")
     print("Keyboard shortcuts:")
@@ -1976,6 +2931,9 @@ def main():
         print("\nShutting down...")
         running = False
         server.shutdown()
+        if ENCODER_PROCESSES > 0:
+            stop_encoder_processes()
+        close_shared_ring()
 
 if __name__ == "__main__":
     main()